@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+
+# compares the two ways extract_citations reads <cit> elements: regexes over the
+# serialized glossa vs XPath over the glossa element. Resolution is left out, since
+# it is the same for both. Run from this directory:
+#     python bench_extract_citations.py [glossae_*.jsonl ...]
+
+import json
+import pathlib
+import re
+import sys
+import timeit
+
+from lxml import etree
+
+from convert_ot_cit import CITS, _citation_fields, _citation_fields_el
+
+TEST_DATA_DIR = pathlib.Path(__file__).parents[2] / "test-data" / "commentaries"
+
+
+def regex_fields(contents):
+    return [
+        _citation_fields(match.group(), content)
+        for content in contents
+        for match in re.finditer(r"<cit.+?/cit>", content)
+    ]
+
+
+def element_fields(elements, contents):
+    return [
+        _citation_fields_el(cit, content)
+        for el, content in zip(elements, contents)
+        for cit in CITS(el)
+    ]
+
+
+def main():
+    paths = [pathlib.Path(p) for p in sys.argv[1:]] or sorted(
+        TEST_DATA_DIR.glob("*/glossae_*.jsonl")
+    )
+    contents = []
+    for path in paths:
+        with open(path) as f:
+            contents += [json.loads(line)["content"] for line in f]
+    # glossae whose citations the regexes can't read are skipped by both
+    usable = []
+    for content in contents:
+        try:
+            regex_fields([content])
+        except AssertionError:
+            continue
+        usable.append(content)
+    elements = [etree.fromstring(content) for content in usable]
+
+    by_regex = regex_fields(usable)
+    by_element = element_fields(elements, usable)
+    print(f"{len(usable)} glossae ({len(contents) - len(usable)} skipped), ", end="")
+    print(f"{len(by_regex)} citations by regex, {len(by_element)} by XPath")
+    if len(by_regex) == len(by_element):
+        differ = [(a, b) for a, b in zip(by_regex, by_element) if a != b]
+        print(f"{len(differ)} citations read differently, e.g.:")
+        for a, b in differ[:5]:
+            print(f"  regex: {a}\n  xpath: {b}")
+
+    for label, stmt in (
+        ("regex over xml", lambda: regex_fields(usable)),
+        ("xpath over elements", lambda: element_fields(elements, usable)),
+        (
+            "parse xml, then xpath",
+            lambda: element_fields(
+                [etree.fromstring(content) for content in usable], usable
+            ),
+        ),
+    ):
+        seconds = min(timeit.repeat(stmt, number=1, repeat=5))
+        print(f"{label:>24}: {seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
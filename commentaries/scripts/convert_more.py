@@ -5,7 +5,7 @@ import pathlib
 
 from lxml import etree
 
-from convert_ot import get_glossae
+from convert_ot import iter_glossae
 
 
 AUTHOR_ID = "viaf2603144"
@@ -38,7 +38,7 @@ for path in sorted(AUTHOR_DIR.iterdir()):
                 
                 with open(DESTO_DIR / "glossae_001.jsonl", "w") as f:
                     idx = 0
-                    for corresp, content in get_glossae(SRC_FILE, TEXTURN):
+                    for corresp, content in iter_glossae(SRC_FILE, TEXTURN):
                         idx += 1
                         entry = {
                             "urn": f"{URN_PREFIX}:{idx}",
@@ -1,11 +1,14 @@
 #!/usr/bin/env python
 
-import json
+import argparse
 import pathlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
 
 from lxml import etree
 
-from convert_ot_cit import get_glossae, extract_citations
+from convert_ot_cit import TEI, convert_commentary
+from ref_to_urn import CitationSink, ResolutionCache, RESOLUTION_CACHE_FILE
 
 
 AUTHOR_ID = "viaf2603144"
@@ -16,72 +19,101 @@ AUTHOR_DIR = (
 TEST_DATA_DIR = pathlib.Path(__file__).parents[2] / "test-data" / "commentaries"
 
 
-for path in sorted(AUTHOR_DIR.iterdir()):
-    if path.is_dir() and path.name[-1].isdigit():
-        for subpath in sorted(path.iterdir()):
-            if subpath.name == "__cts__.xml":
-                pass  # skip
-            else:
-                SRC_FILE = subpath
-                URN_PREFIX = f"urn:cts:greekLit:{subpath.stem}"
-                root = etree.parse(SRC_FILE).getroot()
-                LABEL = " ".join(
-                    [
-                        root.xpath(
-                            "//tei:titleStmt/tei:title",
-                            namespaces={"tei": "http://www.tei-c.org/ns/1.0"},
-                        )[0].text,
-                        "by",
-                        root.xpath(
-                            "//tei:titleStmt/tei:author",
-                            namespaces={"tei": "http://www.tei-c.org/ns/1.0"},
-                        )[0].text,
-                    ]
-                )
-                corresp = root.xpath(
-                    "//*[@corresp]", namespaces={"tei": "http://www.tei-c.org/ns/1.0"}
-                )
-                if corresp:
-                    TEXTURN = (
-                        ":".join(corresp[0].attrib["corresp"].split(":")[:-1]) + ":"
-                    )
-                DESTO_DIR = TEST_DATA_DIR / subpath.stem
-
-                if not DESTO_DIR.exists():
-                    DESTO_DIR.mkdir(parents=True)
-
-                with open(DESTO_DIR / "glossae_001.jsonl", "w") as f:
-                    idx = 0
-                    cit_counter = {"count": 0}
-                    for corresp, content in get_glossae(SRC_FILE, TEXTURN):
-                        idx += 1
-                        citations = extract_citations(
-                            content,
-                            idx,
-                            cit_counter,
-                            urn_prefix=f"{URN_PREFIX}.perseus-eng1",
-                            filename=str(subpath),
-                        )
-                        entry = {
-                            "urn": f"{URN_PREFIX}:{idx}",
-                            "corresp": corresp,
-                            "content": content,
-                            "citations": extract_citations(
-                                content,
-                                idx,
-                                cit_counter,
-                                urn_prefix=f"{URN_PREFIX}.perseus-eng1",
-                                filename=str(subpath),
-                            ),
-                        }
-                        print(json.dumps(entry, ensure_ascii=False), file=f)
-
-                metadata = {
-                    "label": LABEL,
-                    "urn": URN_PREFIX,
-                    "kind": "Commentary",
-                    "entries": ["glossae_001.jsonl"],
-                }
-
-                with open(DESTO_DIR / "metadata.json", "w") as f:
-                    json.dump(metadata, f, indent=2, ensure_ascii=False)
+def get_volumes() -> list[pathlib.Path]:
+    volumes = []
+    for path in sorted(AUTHOR_DIR.iterdir()):
+        if path.is_dir() and path.name[-1].isdigit():
+            for subpath in sorted(path.iterdir()):
+                if subpath.name == "__cts__.xml":
+                    pass  # skip
+                else:
+                    volumes.append(subpath)
+    return volumes
+
+
+def get_volume_info(subpath: pathlib.Path) -> tuple[str, Optional[str]]:
+    """
+    The label ("<title> by <author>" from the titleStmt) and text urn (from the first
+    corresp attribute) of a volume, read without building the whole tree.
+    """
+    title = author = text_urn = None
+    for event, el in etree.iterparse(str(subpath), events=("start", "end")):
+        if event == "start":
+            if text_urn is None and "corresp" in el.attrib:
+                text_urn = ":".join(el.attrib["corresp"].split(":")[:-1]) + ":"
+        else:
+            if el.getparent() is not None and el.getparent().tag == TEI("titleStmt"):
+                if title is None and el.tag == TEI("title"):
+                    title = el.text
+                elif author is None and el.tag == TEI("author"):
+                    author = el.text
+            el.clear()
+            while el.getprevious() is not None:
+                del el.getparent()[0]
+        if title is not None and author is not None and text_urn is not None:
+            break
+    return " ".join([title, "by", author]), text_urn
+
+
+def convert_volume(
+    subpath: pathlib.Path, resolver: ResolutionCache, sink: CitationSink
+) -> None:
+    """Writes glossae_001.jsonl and metadata.json for one volume, and its citations to `sink`."""
+    URN_PREFIX = f"urn:cts:greekLit:{subpath.stem}"
+    LABEL, TEXTURN = get_volume_info(subpath)
+    convert_commentary(
+        subpath,
+        TEST_DATA_DIR / subpath.stem,
+        URN_PREFIX,
+        TEXTURN,
+        label=LABEL,
+        cit_urn_prefix=f"{URN_PREFIX}.perseus-eng1",
+        sink=sink,
+        resolver=resolver,
+    )
+
+
+def _convert_volume_worker(subpath: pathlib.Path) -> ResolutionCache:
+    # each worker writes its citations to a shard named after the volume, and starts
+    # from the saved resolutions and hands its own back to the parent, which is the
+    # only process that saves them
+    resolver = ResolutionCache(RESOLUTION_CACHE_FILE)
+    with CitationSink(shard=subpath.stem) as sink:
+        convert_volume(subpath, resolver, sink)
+    return resolver
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=f"Convert the {AUTHOR_ID} commentaries to ATLAS glossae."
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="number of volumes to convert in parallel",
+    )
+    args = parser.parse_args()
+
+    volumes = get_volumes()
+    # shared across volumes, since they cite the same passages
+    resolver = ResolutionCache(RESOLUTION_CACHE_FILE)
+
+    if args.jobs <= 1:
+        with CitationSink() as sink:
+            for subpath in volumes:
+                convert_volume(subpath, resolver, sink)
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            for worker_resolver in executor.map(_convert_volume_worker, volumes):
+                resolver.merge(worker_resolver)
+        # append each volume's citations in the same order as a serial run
+        CitationSink.merge_shards([subpath.stem for subpath in volumes])
+
+    resolver.save()
+    print(f"citation resolutions: {resolver.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -38,57 +38,92 @@ def get_glossae(src_file, text_urn):
     for child in commentary_div:
         if child.tag == TEI("p"):
             continue  # for now
-        assert child.tag == TEI("div"), child.tag
-        assert child.attrib["type"] == "textpart"
-        # assert child.attrib["subtype"] == "section"
-        corresp = child.attrib.get("corresp")
-        if not corresp:
+        yield from _textpart_glossae(child, text_urn)
+
+
+def iter_glossae(src_file, text_urn):
+    """
+    Streaming version of get_glossae: the glossae of each textpart of the commentary
+    are yielded as soon as the textpart has been parsed, and the textpart is freed
+    afterwards, so memory use doesn't grow with the size of the commentary.
+    """
+    depth = 0
+    commentary_div = None
+    for event, el in etree.iterparse(str(src_file), events=("start", "end")):
+        if event == "start":
+            depth += 1
+            # the first element of TEI/text/body, i.e. root[1][0][0] in get_glossae
+            if (commentary_div is None and depth == 4
+                    and el.getparent().tag == TEI("body")
+                    and el.getparent().getparent().tag == TEI("text")):
+                commentary_div = el
+                assert commentary_div.tag == TEI("div")
+                assert commentary_div.attrib["type"] == "commentary"
             continue
 
-        for gchild in child:
-            if gchild.tag == TEI("head"):
-                continue
-            elif gchild.tag == TEI("p"):
-                for ggchild in gchild:
-                    assert ggchild.tag in [
+        depth -= 1
+        if commentary_div is None or el.getparent() is not commentary_div:
+            continue
+        if el.tag != TEI("p"):  # for now
+            yield from _textpart_glossae(el, text_urn)
+        # free the textpart and anything before it
+        el.clear()
+        while el.getprevious() is not None:
+            del commentary_div[0]
+
+
+def _textpart_glossae(child, text_urn):
+    assert child.tag == TEI("div"), child.tag
+    assert child.attrib["type"] == "textpart"
+    # assert child.attrib["subtype"] == "section"
+    corresp = child.attrib.get("corresp")
+    if not corresp:
+        return
+
+    for gchild in child:
+        if gchild.tag == TEI("head"):
+            continue
+        elif gchild.tag == TEI("p"):
+            for ggchild in gchild:
+                assert ggchild.tag in [
+                    TEI("foreign"),
+                    TEI("emph"),
+                    TEI("title"),
+                    TEI("bibl"),
+                    TEI("ref"),
+                    TEI("cit"),
+                    TEI("quote"),
+                    TEI("app"),
+                ], ggchild.tag
+            yield (corresp, to_xml(gchild))
+        else:
+            assert gchild.tag == TEI("div"), gchild.tag
+            assert gchild.attrib["type"] == "textpart"
+            if gchild.attrib["subtype"] != "commline":
+                continue  # for now
+            if gchild.attrib.get("corresp"):
+                corresp2 = gchild.attrib["corresp"]
+            else:
+                corresp2 = text_urn + gchild.attrib["n"]
+            for ggchild in gchild:
+                if ggchild.tag == TEI("head"):
+                    continue
+                # assert ggchild.tag == TEI("p"), ggchild.tag
+                for gggchild in ggchild:
+                    if isinstance(gggchild, etree._Comment):
+                        continue
+                    assert gggchild.tag in [
+                        TEI("app"),
                         TEI("foreign"),
+                        TEI("cit"),
                         TEI("emph"),
-                        TEI("title"),
                         TEI("bibl"),
-                        TEI("ref"),
-                        TEI("cit"),
+                        TEI("title"),
+                        TEI("date"),
                         TEI("quote"),
-                        TEI("app"),
-                    ], ggchild.tag
-                yield (corresp, to_xml(gchild))
-            else:
-                assert gchild.tag == TEI("div"), gchild.tag
-                assert gchild.attrib["type"] == "textpart"
-                if gchild.attrib["subtype"] != "commline":
-                    continue  # for now
-                if gchild.attrib.get("corresp"):
-                    corresp2 = gchild.attrib["corresp"]
-                else:
-                    corresp2 = text_urn + gchild.attrib["n"]
-                for ggchild in gchild:
-                    if ggchild.tag == TEI("head"):
-                        continue
-                    # assert ggchild.tag == TEI("p"), ggchild.tag
-                    for gggchild in ggchild:
-                        if isinstance(gggchild, etree._Comment):
-                            continue
-                        assert gggchild.tag in [
-                            TEI("app"),
-                            TEI("foreign"),
-                            TEI("cit"),
-                            TEI("emph"),
-                            TEI("bibl"),
-                            TEI("title"),
-                            TEI("date"),
-                            TEI("quote"),
-                            TEI("ref"),
-                        ], gggchild.tag
-                yield (corresp2, to_xml(gchild))
+                        TEI("ref"),
+                    ], gggchild.tag
+            yield (corresp2, to_xml(gchild))
 
 
 if __name__ == "__main__":
@@ -99,7 +134,7 @@ if __name__ == "__main__":
 
     with open(DESTO_DIR / "glossae_001.jsonl", "w") as f:
         idx = 0
-        for corresp, content in get_glossae(SRC_FILE, TEXT_URN):
+        for corresp, content in iter_glossae(SRC_FILE, TEXT_URN):
             idx += 1
             entry = {
                 "urn": f"{URN_PREFIX}:{idx}",
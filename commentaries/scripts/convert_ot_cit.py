@@ -4,11 +4,20 @@
 import json
 import re
 import pathlib
-from typing import Optional
+from typing import Optional, Union
 
 from lxml import etree
 
-from ref_to_urn import get_urn, get_ref, mk_cit_data, CITATION_FAIL_OUT, CITATION_OUT
+from ref_to_urn import (
+    get_urn,
+    get_ref,
+    mk_cit_data,
+    CitationSink,
+    ResolutionCache,
+    CITATION_FAIL_OUT,
+    CITATION_OUT,
+    RESOLUTION_CACHE_FILE,
+)
 
 
 def TEI(tag):
@@ -31,7 +40,7 @@ def to_xml(el):
     ).strip()
 
 
-def get_glossae(src_file, text_urn):
+def get_glossae(src_file, text_urn, as_element=False):
     tree = etree.parse(src_file)
     root = tree.getroot()
 
@@ -43,93 +52,197 @@ def get_glossae(src_file, text_urn):
     for child in commentary_div:
         if child.tag == TEI("p"):
             continue  # for now
-        assert child.tag == TEI("div"), child.tag
-        assert child.attrib["type"] == "textpart"
-        # assert child.attrib["subtype"] == "section"
-        corresp = child.attrib.get("corresp")
-        if not corresp:
+        yield from _textpart_glossae(child, text_urn, as_element)
+
+
+def iter_glossae(src_file, text_urn, as_element=False):
+    """
+    Streaming version of get_glossae: the glossae of each textpart of the commentary
+    are yielded as soon as the textpart has been parsed, and the textpart is freed
+    afterwards, so memory use doesn't grow with the size of the commentary.
+    With `as_element`, glossae are yielded as elements rather than xml; they are only
+    valid until the next glossa is requested.
+    """
+    depth = 0
+    commentary_div = None
+    for event, el in etree.iterparse(str(src_file), events=("start", "end")):
+        if event == "start":
+            depth += 1
+            # the first element of TEI/text/body, i.e. root[1][0][0] in get_glossae
+            if (
+                commentary_div is None
+                and depth == 4
+                and el.getparent().tag == TEI("body")
+                and el.getparent().getparent().tag == TEI("text")
+            ):
+                commentary_div = el
+                assert commentary_div.tag == TEI("div")
+                assert commentary_div.attrib["type"] == "commentary"
+            continue
+
+        depth -= 1
+        if commentary_div is None or el.getparent() is not commentary_div:
             continue
+        if el.tag != TEI("p"):  # for now
+            yield from _textpart_glossae(el, text_urn, as_element)
+        # free the textpart and anything before it
+        el.clear()
+        while el.getprevious() is not None:
+            del commentary_div[0]
 
-        for gchild in child:
-            if gchild.tag == TEI("head"):
-                continue
-            elif gchild.tag == TEI("p"):
-                for ggchild in gchild:
-                    assert ggchild.tag in [
+
+def _textpart_glossae(child, text_urn, as_element=False):
+    assert child.tag == TEI("div"), child.tag
+    assert child.attrib["type"] == "textpart"
+    # assert child.attrib["subtype"] == "section"
+    corresp = child.attrib.get("corresp")
+    if not corresp:
+        return
+
+    for gchild in child:
+        if gchild.tag == TEI("head"):
+            continue
+        elif gchild.tag == TEI("p"):
+            for ggchild in gchild:
+                assert ggchild.tag in [
+                    TEI("foreign"),
+                    TEI("emph"),
+                    TEI("title"),
+                    TEI("bibl"),
+                    TEI("ref"),
+                    TEI("cit"),
+                    TEI("quote"),
+                    TEI("app"),
+                ], ggchild.tag
+            yield (corresp, gchild if as_element else to_xml(gchild))
+        else:
+            assert gchild.tag == TEI("div"), gchild.tag
+            assert gchild.attrib["type"] == "textpart"
+            if gchild.attrib["subtype"] != "commline":
+                continue  # for now
+            if gchild.attrib.get("corresp"):
+                corresp2 = gchild.attrib["corresp"]
+            else:
+                corresp2 = text_urn + str(gchild.attrib["n"])
+            for ggchild in gchild:
+                if ggchild.tag == TEI("head"):
+                    continue
+                # assert ggchild.tag == TEI("p"), ggchilt.tag
+                for gggchild in ggchild:
+                    if isinstance(gggchild, etree._Comment):
+                        continue
+                    assert gggchild.tag in [
+                        TEI("app"),
                         TEI("foreign"),
+                        TEI("cit"),
                         TEI("emph"),
-                        TEI("title"),
                         TEI("bibl"),
-                        TEI("ref"),
-                        TEI("cit"),
+                        TEI("title"),
+                        TEI("date"),
                         TEI("quote"),
-                        TEI("app"),
-                    ], ggchild.tag
-                yield (corresp, to_xml(gchild))
-            else:
-                assert gchild.tag == TEI("div"), gchild.tag
-                assert gchild.attrib["type"] == "textpart"
-                if gchild.attrib["subtype"] != "commline":
-                    continue  # for now
-                if gchild.attrib.get("corresp"):
-                    corresp2 = gchild.attrib["corresp"]
-                else:
-                    corresp2 = text_urn + str(gchild.attrib["n"])
-                for ggchild in gchild:
-                    if ggchild.tag == TEI("head"):
-                        continue
-                    # assert ggchild.tag == TEI("p"), ggchilt.tag
-                    for gggchild in ggchild:
-                        if isinstance(gggchild, etree._Comment):
-                            continue
-                        assert gggchild.tag in [
-                            TEI("app"),
-                            TEI("foreign"),
-                            TEI("cit"),
-                            TEI("emph"),
-                            TEI("bibl"),
-                            TEI("title"),
-                            TEI("date"),
-                            TEI("quote"),
-                            TEI("ref"),
-                        ], gggchild.tag
-                yield (corresp2, to_xml(gchild))
-
-
-# Take the xml of a <p> element yielded by get_glossae and extract the citations
+                        TEI("ref"),
+                    ], gggchild.tag
+            yield (corresp2, gchild if as_element else to_xml(gchild))
+
+
+NAMESPACES = {"tei": "http://www.tei-c.org/ns/1.0"}
+
+CITS = etree.XPath(".//tei:cit", namespaces=NAMESPACES)
+CIT_QUOTE = etree.XPath("(.//tei:quote)[1]", namespaces=NAMESPACES)
+CIT_BIBL = etree.XPath("(.//tei:bibl)[1]", namespaces=NAMESPACES)
+
+
+def _inner_xml(el) -> Optional[str]:
+    """
+    The contents of `el` serialized as in to_xml (i.e. as they appear in the glossa content),
+    or None if empty
+    """
+    xml = etree.tostring(el, with_tail=False, encoding="unicode", method="xml")
+    if xml.endswith("/>"):
+        return None
+    # attribute values are serialized with ">" escaped, so the first ">" ends the start tag
+    inner = re.sub(r"\s+", " ", xml[xml.index(">") + 1 : xml.rindex("</")])
+    return inner or None
+
+
+def _citation_fields(
+    cit_xml: str, p_xml: str
+) -> tuple[str, Optional[str], Optional[str]]:
+    """quote, bibl n attribute and bibl contents of the serialized <cit> element `cit_xml`"""
+    quote = re.search(r"<quote.*?>(.+)</quote>", cit_xml)
+    assert quote, f"Issue extracting quote from {p_xml}\n\nin citation {cit_xml}"
+    quote = quote.group(1)
+    # TODO: sometimes contents of bibl element is in format "v. #"
+    # we can't consistently prefer the n attribute or the bibl element, have to
+    # check which one better matches the desired pattern
+    from_n = re.search(r"<bibl.+?n=\"(.+?)\".*>", cit_xml)
+    from_bibl = re.search(r"<bibl.*?>(.+)</bibl>", cit_xml)
+    # pull from n attribute if bibl element is in the form "v. #" or if bibl element does not contain ref
+    if from_n:
+        from_n = from_n.group(1)
+    if from_bibl:
+        from_bibl = from_bibl.group(1)
+    return quote, from_n, from_bibl
+
+
+def _citation_fields_el(cit, p_xml: str) -> tuple[str, Optional[str], Optional[str]]:
+    """quote, bibl n attribute and bibl contents of the <cit> element `cit`"""
+    quote = CIT_QUOTE(cit)
+    quote = _inner_xml(quote[0]) if quote else None
+    assert quote, f"Issue extracting quote from {p_xml}\n\nin citation {to_xml(cit)}"
+    from_n = None
+    from_bibl = None
+    bibl = CIT_BIBL(cit)
+    if bibl:
+        from_n = bibl[0].get("n") or None
+        from_bibl = _inner_xml(bibl[0])
+    return quote, from_n, from_bibl
+
+
+# Take a <p> element yielded by get_glossae (or its xml) and extract the citations
 # from <cit> elements in the format
 # [{"urn": "urn:cite2:scaife-viewer:citations.atlas_v1:lsj-445456",
 # "data": {"quote": "", "ref": "Od. 1.85 (written", "urn": "urn:cts:greekLit:tlg0012.tlg002.perseus-grc2:1.85"}}]
 def extract_citations(
-    p_xml: str, idx: int, counter: dict, urn_prefix, filename: Optional[str] = None
+    p_xml: Union[str, etree._Element],
+    idx: int,
+    counter: dict,
+    urn_prefix,
+    filename: Optional[str] = None,
+    sink: Optional[CitationSink] = None,
+    resolver: Optional[ResolutionCache] = None,
+    content: Optional[str] = None,
 ) -> list:
-    # quick experimentation suggests extracting information from a single <cit> element is faster
-    # using regex parsing than lxml.etree parsing
-    matches = re.finditer(r"<cit.+?/cit>", p_xml)
+    """
+    If `p_xml` is an element, the citations are read from it with XPath, and `content`
+    (default: to_xml of the element) is what gets stored as the xml context. Otherwise
+    they are read from the xml string with regexes; see bench_extract_citations.py for
+    how the two compare.
+    """
+    if isinstance(p_xml, etree._Element):
+        if content is None:
+            content = to_xml(p_xml)
+        fields = (_citation_fields_el(cit, content) for cit in CITS(p_xml))
+    else:
+        content = p_xml
+        fields = (
+            _citation_fields(match.group(), content)
+            for match in re.finditer(r"<cit.+?/cit>", content)
+        )
     citations = []
-    for match in matches:
+    for quote, from_n, from_bibl in fields:
         cit_urn = f"{urn_prefix}:citations-{idx}.{counter['count']}"
         counter["count"] += 1
-        quote = re.search(r"<quote.*?>(.+)</quote>", match.group())
-        assert (
-            quote
-        ), f"Issue extracting quote from {p_xml}\n\nin citation {match.group()}"
-        quote = quote.group(1)
-        # TODO: sometimes contents of bibl element is in format "v. #"
-        # we can't consistently prefer the n attribute or the bibl element, have to
-        # check which one better matches the desired pattern
-        from_n = re.search(r"<bibl.+?n=\"(.+?)\".*>", match.group())
-        from_bibl = re.search(r"<bibl.*?>(.+)</bibl>", match.group())
-        # pull from n attribute if bibl element is in the form "v. #" or if bibl element does not contain ref
-        if from_n:
-            from_n = from_n.group(1)
-        if from_bibl:
-            from_bibl = from_bibl.group(1)
-        ref = get_ref(from_n, from_bibl)
-        # assert ref, f"Issue extracting ref from {p_xml}\n\nin citation {match.group()}"
         # sometimes, the n attribute includes important information like author name,
         # that the bibl element lacks
-        target_urn = get_urn(ref, content=p_xml, filename=filename)
+        if resolver is not None:
+            ref, target_urn = resolver.resolve(
+                from_n, from_bibl, content=content, filename=filename
+            )
+        else:
+            ref = get_ref(from_n, from_bibl)
+            # assert ref, f"Issue extracting ref from {content}\n\nin citation {cit_urn}"
+            target_urn = get_urn(ref, content=content, filename=filename)
         citation = {
             "urn": cit_urn,
             "data": {
@@ -140,42 +253,95 @@ def extract_citations(
         }
         citations.append(citation)
         # save citation data as separate jsonl files in ./cit_data
-        mk_cit_data(ref, from_n, from_bibl, target_urn, quote, p_xml, filename, cit_urn)
+        mk_cit_data(
+            ref,
+            from_n,
+            from_bibl,
+            target_urn,
+            quote,
+            content,
+            filename,
+            cit_urn,
+            sink=sink,
+        )
     return citations
 
 
-if __name__ == "__main__":
-    SRC_FILE = pathlib.Path(
-        "../../../canonical_pdlrefwk/data/viaf2603144/viaf001/viaf2603144.viaf001.perseus-eng1.xml"
-    )
-    TEXT_URN = "urn:cts:greekLit:tlg0011.tlg004:"  # note trailing colon
-    DESTO_DIR = pathlib.Path("../../test-data/commentaries/jebb-ot")
-    URN_PREFIX = "urn:cts:greekLit:viaf2603144.viaf001.perseus-eng1"
-
-    CITATION_FAIL_OUT.unlink(missing_ok=True)
-    CITATION_OUT.unlink(missing_ok=True)
+def convert_commentary(
+    src: pathlib.Path,
+    dest: pathlib.Path,
+    urn_prefix: str,
+    text_urn: Optional[str],
+    label: str = "",
+    cit_urn_prefix: Optional[str] = None,
+    sink: Optional[CitationSink] = None,
+    resolver: Optional[ResolutionCache] = None,
+) -> int:
+    """
+    Writes the glossae of the TEI commentary `src` to dest/glossae_001.jsonl, resolving the
+    citations of each glossa once, and dest/metadata.json. Citation urns start with
+    `cit_urn_prefix`, which defaults to `urn_prefix`. Returns the number of glossae.
+    """
+    if cit_urn_prefix is None:
+        cit_urn_prefix = urn_prefix
+    dest.mkdir(parents=True, exist_ok=True)
 
-    with open(DESTO_DIR / "glossae_001.jsonl", "w") as f:
+    with open(dest / "glossae_001.jsonl", "w") as f:
         idx = 0
         cit_counter = {"count": 0}
-        for corresp, content in get_glossae(SRC_FILE, TEXT_URN):
+        for corresp, content in iter_glossae(src, text_urn):
             idx += 1
             entry = {
-                "urn": f"{URN_PREFIX}:{idx}",
+                "urn": f"{urn_prefix}:{idx}",
                 "corresp": corresp,
                 "content": content,
                 "citations": extract_citations(
-                    content, idx, cit_counter, URN_PREFIX, filename=str(SRC_FILE)
+                    content,
+                    idx,
+                    cit_counter,
+                    cit_urn_prefix,
+                    filename=str(src),
+                    sink=sink,
+                    resolver=resolver,
                 ),
             }
             print(json.dumps(entry, ensure_ascii=False), file=f)
 
     metadata = {
-        "label": "Commentary on Sophocles: Oedipus Tyrannus by Sir Richard C. Jebb",
-        "urn": URN_PREFIX,
+        "label": label,
+        "urn": urn_prefix,
         "kind": "Commentary",
         "entries": ["glossae_001.jsonl"],
     }
 
-    with open(DESTO_DIR / "metadata.json", "w") as f:
+    with open(dest / "metadata.json", "w") as f:
         json.dump(metadata, f, indent=2, ensure_ascii=False)
+
+    return idx
+
+
+if __name__ == "__main__":
+    SRC_FILE = pathlib.Path(
+        "../../../canonical_pdlrefwk/data/viaf2603144/viaf001/viaf2603144.viaf001.perseus-eng1.xml"
+    )
+    TEXT_URN = "urn:cts:greekLit:tlg0011.tlg004:"  # note trailing colon
+    DESTO_DIR = pathlib.Path("../../test-data/commentaries/jebb-ot")
+    URN_PREFIX = "urn:cts:greekLit:viaf2603144.viaf001.perseus-eng1"
+
+    CITATION_FAIL_OUT.unlink(missing_ok=True)
+    CITATION_OUT.unlink(missing_ok=True)
+
+    with (
+        CitationSink() as sink,
+        ResolutionCache(RESOLUTION_CACHE_FILE) as resolver,
+    ):
+        convert_commentary(
+            SRC_FILE,
+            DESTO_DIR,
+            URN_PREFIX,
+            TEXT_URN,
+            label="Commentary on Sophocles: Oedipus Tyrannus by Sir Richard C. Jebb",
+            sink=sink,
+            resolver=resolver,
+        )
+        print(f"citation resolutions: {resolver.stats()}")
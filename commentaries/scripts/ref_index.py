@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+
+# token-level prefix indexes over the author and work tables in works_*.py,
+# so that ref_to_urn can recognize "dion. hal. rom. ant. 2.2" style refs by walking
+# the tokens of a ref once instead of re-joining split[:2], split[:3], ... and
+# probing AUTH_ABB/AUTHORS/WORK_URNS for every candidate
+
+from typing import Any, Callable, Iterator, Optional
+
+
+class PrefixIndex:
+    """
+    Trie over the keys of a lookup table, where keys are split into tokens on `sep`.
+    A key matches a run of ref tokens when `sep.join(tokens[start:end]) == key`,
+    so tokens that themselves contain `sep` (e.g. an underscored title) still match.
+    Terminal nodes hold (key, value) under the None key, which no token can collide with.
+    """
+
+    def __init__(self, table: Optional[dict] = None, sep: str = " "):
+        self.sep = sep
+        self.root: dict = {}
+        for key, value in (table or {}).items():
+            self.add(key, value)
+
+    def add(self, key: str, value: Any) -> None:
+        node = self.root
+        for segment in key.split(self.sep):
+            node = node.setdefault(segment, {})
+        node[None] = (key, value)
+
+    def prefixes(
+        self, tokens: list, start: int = 0, limit: Optional[int] = None
+    ) -> Iterator[tuple[int, str, Any]]:
+        """
+        Yields (end, key, value) for every key matching tokens[start:end], shortest first,
+        considering at most `limit` tokens. `end` is the position after the matched prefix.
+        """
+        stop = len(tokens) if limit is None else min(len(tokens), start + limit)
+        node = self.root
+        for end in range(start, stop):
+            token = tokens[end]
+            for segment in token.split(self.sep) if self.sep in token else (token,):
+                node = node.get(segment)
+                if node is None:
+                    return
+            if None in node:
+                key, value = node[None]
+                yield end + 1, key, value
+
+    def first(
+        self,
+        tokens: list,
+        start: int = 0,
+        limit: Optional[int] = None,
+        accept: Callable[[Any], Any] = bool,
+    ) -> Optional[tuple[int, str, Any]]:
+        """Shortest matching prefix whose value passes `accept`, mirroring the unigram, bigram, ... probes."""
+        for match in self.prefixes(tokens, start, limit):
+            if accept(match[2]):
+                return match
+        return None
+
+    def longest(
+        self,
+        tokens: list,
+        start: int = 0,
+        limit: Optional[int] = None,
+        accept: Callable[[Any], Any] = bool,
+    ) -> Optional[tuple[int, str, Any]]:
+        found = None
+        for match in self.prefixes(tokens, start, limit):
+            if accept(match[2]):
+                found = match
+        return found
+
+
+def build_author_index(auth_abb: dict, auth_urns: dict) -> PrefixIndex:
+    """
+    Index every author form (abbreviation or full name). Each value is a pair
+    (ref_author, urn_author):
+    - ref_author is what get_ref resolves the form to (the form itself if it is an
+      author, else its AUTH_ABB target); falsy if get_ref would not recognize it
+    - urn_author is what get_urn resolves the form to (AUTH_ABB.get(form, form)), or
+      None if that is neither a known author nor a disambiguating function
+    """
+    entries = {}
+    for form in auth_abb.keys() | auth_urns.keys():
+        ref_author = form if form in auth_urns else auth_abb.get(form)
+        urn_author = auth_abb.get(form, form)
+        if urn_author not in auth_urns and not callable(urn_author):
+            urn_author = None
+        entries[form] = (ref_author, urn_author)
+    return PrefixIndex(entries)
+
+
+def build_work_indexes(work_urns: dict, sep: str) -> dict[str, PrefixIndex]:
+    return {
+        author: PrefixIndex(works, sep=sep) for author, works in work_urns.items()
+    }
+
+
+class CitationIndex:
+    """
+    Author and work indexes for the merged works tables. `works` is keyed on titles
+    as written (space separated), `works_underscored` on titles as get_urn rewrites
+    them, with spaces replaced by "_".
+    """
+
+    def __init__(self, auth_abb: dict, auth_urns: dict, work_urns: dict):
+        self.authors = build_author_index(auth_abb, auth_urns)
+        self.works = build_work_indexes(work_urns, " ")
+        self.works_underscored = build_work_indexes(work_urns, "_")
+
+    def match_author(
+        self, tokens: list, limit: int = 3
+    ) -> Optional[tuple[int, str, str]]:
+        """(end, form, author) for the first author form get_ref would recognize"""
+        match = self.authors.first(tokens, limit=limit, accept=lambda v: v[0])
+        if match is None:
+            return None
+        end, form, (ref_author, _) = match
+        return end, form, ref_author
+
+    def match_urn_author(
+        self, tokens: list, limit: int = 4
+    ) -> Optional[tuple[int, str, Any]]:
+        """(end, form, author) for the first author form get_urn would resolve; author may be a function"""
+        match = self.authors.first(tokens, limit=limit, accept=lambda v: v[1])
+        if match is None:
+            return None
+        end, form, (_, urn_author) = match
+        return end, form, urn_author
+
+    def match_work(
+        self,
+        author: Any,
+        tokens: list,
+        start: int = 0,
+        limit: Optional[int] = None,
+        underscored: bool = False,
+    ) -> Optional[tuple[int, str, Any]]:
+        """(end, title, work urn) for the first title of `author` starting at tokens[start]"""
+        indexes = self.works_underscored if underscored else self.works
+        index = indexes.get(author) if isinstance(author, str) else None
+        if index is None:
+            return None
+        return index.first(tokens, start=start, limit=limit)
+
+    def match(
+        self, tokens: list, author_limit: int = 3, work_limit: int = 3
+    ) -> Optional[tuple[str, Optional[str], int]]:
+        """
+        Recognize author and work in one pass over `tokens`. Returns
+        (author, work urn or None, position after the last recognized token),
+        or None if no author is recognized.
+        """
+        author_match = self.match_author(tokens, limit=author_limit)
+        if author_match is None:
+            return None
+        end, _, author = author_match
+        work_match = self.match_work(author, tokens, start=end, limit=work_limit)
+        if work_match is None:
+            return author, None, end
+        work_end, _, work_urn = work_match
+        return author, work_urn, work_end
@@ -6,7 +6,16 @@
 # do this for numeric citations as well
 # also have a file mapping all refs to their resolutions
 
+import collections
+import contextlib
+import hashlib
+import importlib
+import itertools
 import logging
+import os
+import pickle
+import shutil
+import threading
 from typing import Optional, Union
 import sys
 import pathlib
@@ -14,60 +23,32 @@ import jsonlines
 import re
 from lxml import etree
 
-from works_greek import (
-    GREEK_AUTH_URNS,
-    GREEK_WORK_URNS,
-    GREEK_AUTH_ABB,
-    GREEK_SINGLE_WORK_AUTHORS,
+from ref_index import CitationIndex
+
+WORKS_MODULES = ("works_greek", "works_latin", "works_other", "works_schol")
+
+# the expanded author/work index is cached here, and rebuilt whenever the works_*.py
+# tables (or the code that expands them) change. bump INDEX_VERSION if the layout
+# of the pickled tables changes
+INDEX_FILE = pathlib.Path(__file__).with_name("ref_index.pickle")
+INDEX_VERSION = 1
+INDEX_SOURCES = tuple(f"{module}.py" for module in WORKS_MODULES) + (
+    "ref_index.py",
+    "ref_to_urn.py",
 )
-from works_latin import (
-    LATIN_AUTH_URNS,
-    LATIN_WORK_URNS,
-    LATIN_AUTH_ABB,
-    LATIN_SINGLE_WORK_AUTHORS,
+# module globals populated from the index on first use, see _ensure_index
+INDEX_NAMES = (
+    "AUTH_URNS",
+    "AUTH_ABB",
+    "WORK_URNS",
+    "SINGLE_WORK_AUTHORS",
+    "AUTHORS",
+    "CITATION_INDEX",
 )
-from works_other import OTHER_AUTH_ABB, OTHER_WORK_URNS, OTHER_AUTH_URNS
-from works_schol import SCHOL_AUTH_ABB, SCHOL_WORK_URNS, SCHOL_AUTH_URNS
-
-# check for duplicate keys betwen greek and latin works
-assert not set(GREEK_AUTH_URNS.keys()).intersection(LATIN_AUTH_URNS.keys())
-assert not set(GREEK_WORK_URNS.keys()).intersection(LATIN_WORK_URNS.keys())
-assert not set(GREEK_AUTH_ABB.keys()).intersection((LATIN_AUTH_ABB.keys()))
-
-# check for duplicate keys betwen greek and other works
-assert not set(GREEK_AUTH_URNS.keys()).intersection(OTHER_AUTH_URNS.keys())
-assert not set(GREEK_WORK_URNS.keys()).intersection(OTHER_WORK_URNS.keys())
-assert not set(GREEK_AUTH_ABB.keys()).intersection((OTHER_AUTH_ABB.keys()))
-
-# check for duplicate keys betwen greek and schol works
-assert not set(GREEK_AUTH_URNS.keys()).intersection(SCHOL_AUTH_URNS.keys())
-assert not set(GREEK_WORK_URNS.keys()).intersection(SCHOL_WORK_URNS.keys())
-assert not set(GREEK_AUTH_ABB.keys()).intersection((SCHOL_AUTH_ABB.keys()))
-
-# check for duplicate keys betwen latin and other works
-assert not set(LATIN_AUTH_URNS.keys()).intersection(OTHER_AUTH_URNS.keys())
-assert not set(LATIN_WORK_URNS.keys()).intersection(OTHER_WORK_URNS.keys())
-assert not set(LATIN_AUTH_ABB.keys()).intersection((OTHER_AUTH_ABB.keys()))
-
-# check for duplicate keys betwen latin and schol works
-assert not set(LATIN_AUTH_URNS.keys()).intersection(SCHOL_AUTH_URNS.keys())
-assert not set(LATIN_WORK_URNS.keys()).intersection(SCHOL_WORK_URNS.keys())
-assert not set(LATIN_AUTH_ABB.keys()).intersection((SCHOL_AUTH_ABB.keys()))
-
-# check for duplicate keys betwen other and schol works
-assert not set(OTHER_AUTH_URNS.keys()).intersection(SCHOL_AUTH_URNS.keys())
-assert not set(OTHER_WORK_URNS.keys()).intersection(SCHOL_WORK_URNS.keys())
-assert not set(OTHER_AUTH_ABB.keys()).intersection((SCHOL_AUTH_ABB.keys()))
-
-AUTH_URNS = GREEK_AUTH_URNS | LATIN_AUTH_URNS | OTHER_AUTH_URNS | SCHOL_AUTH_URNS
-AUTH_ABB = GREEK_AUTH_ABB | LATIN_AUTH_ABB | OTHER_AUTH_ABB | SCHOL_AUTH_ABB
-WORK_URNS = GREEK_WORK_URNS | LATIN_WORK_URNS | OTHER_WORK_URNS | SCHOL_WORK_URNS
-SINGLE_WORK_AUTHORS = GREEK_SINGLE_WORK_AUTHORS.union(LATIN_SINGLE_WORK_AUTHORS)
-
-AUTHORS = set(AUTH_URNS.keys())
 
 CITATION_OUT = pathlib.Path("./cit_data/resolved.jsonl")
 CITATION_FAIL_OUT = pathlib.Path("./cit_data/unresolved.jsonl")
+RESOLUTION_CACHE_FILE = pathlib.Path("./cit_data/resolutions.pickle")
 
 CITATION_OUT.parent.mkdir(parents=True, exist_ok=True)
 CITATION_FAIL_OUT.parent.mkdir(parents=True, exist_ok=True)
@@ -100,7 +81,7 @@ def to_xml(el):
     ).strip()
 
 
-def mk_cit_data(
+def _cit_record(
     ref: Optional[str],
     from_n: Optional[str],
     from_bibl: Optional[str],
@@ -109,10 +90,10 @@ def mk_cit_data(
     xml_context: Union[str, etree._Element],
     filename: Union[str, pathlib.Path, None],
     cit_urn: Optional[str],
-) -> None:
-    """function to save citations as json files, one file for successful resolutions (citations.jsonl)
-    and another for unsuccessful resolutions (citations_unr.jsonl). get_ref and get_urn both return None in case of
-    failure to resolve urn, so mk_cit_data interprets ref = None as failure, ref != None as success.
+) -> tuple[bool, dict]:
+    """
+    Builds the record saved by mk_cit_data, and whether it goes with the resolved citations.
+    get_ref and get_urn both return None in case of failure to resolve urn.
     """
     if isinstance(xml_context, etree._Element):
         xml_context = to_xml(xml_context)
@@ -130,9 +111,7 @@ def mk_cit_data(
             "filename": filename,
             "doc_cit_urn": cit_urn,
         }
-        with jsonlines.open(CITATION_FAIL_OUT, "a") as f:
-            f.write(out)
-        return
+        return False, out
     out = {
         "n_attrib": from_n,
         "bibl": from_bibl,
@@ -143,7 +122,124 @@ def mk_cit_data(
         "filename": filename,
         "doc_cit_urn": cit_urn,
     }
-    with jsonlines.open(CITATION_OUT, "a") as f:
+    return True, out
+
+
+class CitationSink:
+    """
+    Keeps the resolved and unresolved citation files open and writes records to them in
+    batches, instead of opening a file per citation. Use as a context manager:
+
+        with CitationSink() as sink:
+            extract_citations(..., sink=sink)
+
+    A sink can be shared between threads. Processes should not share files, so each
+    worker writes its own shard (CitationSink(shard="viaf001")), and the parent
+    combines them in a fixed order with CitationSink.merge_shards.
+    """
+
+    def __init__(
+        self,
+        resolved_path: pathlib.Path = CITATION_OUT,
+        unresolved_path: pathlib.Path = CITATION_FAIL_OUT,
+        batch_size: int = 1000,
+        shard: Optional[str] = None,
+    ):
+        if shard is not None:
+            resolved_path = self.shard_path(resolved_path, shard)
+            unresolved_path = self.shard_path(unresolved_path, shard)
+        self.paths = {True: resolved_path, False: unresolved_path}
+        self.batch_size = batch_size
+        self.buffers: dict[bool, list] = {True: [], False: []}
+        self.files: dict = {}
+        self.writers: dict = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def shard_path(path: pathlib.Path, shard: str) -> pathlib.Path:
+        return path.parent / "shards" / f"{path.stem}.{shard}{path.suffix}"
+
+    def __enter__(self):
+        for resolved, path in self.paths.items():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.files[resolved] = open(path, "a", encoding="utf-8")
+            self.writers[resolved] = jsonlines.Writer(self.files[resolved])
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, *args, **kwargs) -> None:
+        """Takes the same arguments as mk_cit_data."""
+        resolved, out = _cit_record(*args, **kwargs)
+        with self.lock:
+            self.buffers[resolved].append(out)
+            if len(self.buffers[resolved]) >= self.batch_size:
+                self._flush(resolved)
+
+    def _flush(self, resolved: bool) -> None:
+        if self.buffers[resolved]:
+            self.writers[resolved].write_all(self.buffers[resolved])
+            self.files[resolved].flush()
+            self.buffers[resolved] = []
+
+    def flush(self) -> None:
+        with self.lock:
+            for resolved in self.buffers.keys():
+                self._flush(resolved)
+
+    def close(self) -> None:
+        self.flush()
+        with self.lock:
+            for f in self.files.values():
+                f.close()
+            self.files = {}
+            self.writers = {}
+
+    @classmethod
+    def merge_shards(
+        cls,
+        shards: list,
+        resolved_path: pathlib.Path = CITATION_OUT,
+        unresolved_path: pathlib.Path = CITATION_FAIL_OUT,
+    ) -> None:
+        """Appends the shards to the citation files in the order given, then removes them."""
+        for path in (resolved_path, unresolved_path):
+            with open(path, "a", encoding="utf-8") as out:
+                for shard in shards:
+                    shard_file = cls.shard_path(path, shard)
+                    if not shard_file.exists():
+                        continue
+                    with open(shard_file, encoding="utf-8") as f:
+                        shutil.copyfileobj(f, out)
+                    shard_file.unlink()
+            # only removed once no other shards are left in it
+            with contextlib.suppress(OSError):
+                cls.shard_path(path, "").parent.rmdir()
+
+
+def mk_cit_data(
+    ref: Optional[str],
+    from_n: Optional[str],
+    from_bibl: Optional[str],
+    urn: Optional[str],
+    quote: Optional[str],
+    xml_context: Union[str, etree._Element],
+    filename: Union[str, pathlib.Path, None],
+    cit_urn: Optional[str],
+    sink: Optional[CitationSink] = None,
+) -> None:
+    """function to save citations as json files, one file for successful resolutions (citations.jsonl)
+    and another for unsuccessful resolutions (citations_unr.jsonl). get_ref and get_urn both return None in case of
+    failure to resolve urn, so mk_cit_data interprets ref = None as failure, ref != None as success.
+    Records go through `sink` if given; otherwise the file is opened for this one record.
+    """
+    args = (ref, from_n, from_bibl, urn, quote, xml_context, filename, cit_urn)
+    if sink is not None:
+        sink.write(*args)
+        return
+    resolved, out = _cit_record(*args)
+    with jsonlines.open(CITATION_OUT if resolved else CITATION_FAIL_OUT, "a") as f:
         f.write(out)
     return
 
@@ -313,35 +409,203 @@ def _transform_title(title: str, titles: list) -> list:
     return list(set(transformations))
 
 
-additions = {}
+def _works_table(module, name: str):
+    # e.g. works_greek.GREEK_WORK_URNS; None if the module doesn't define the table
+    prefix = module.__name__.split("_")[-1].upper()
+    return getattr(module, f"{prefix}_{name}", None)
+
 
-for author in WORK_URNS.keys():
-    for title in WORK_URNS[author].keys():
-        prev_titles = list(additions.get(author, {}).keys()) + list(
-            WORK_URNS[author].keys()
+def build_index() -> dict:
+    """
+    Merges the greek, latin, other and schol tables, checks that they don't share any keys,
+    and adds the automatically generated title forms from _transform_title to WORK_URNS.
+    Returns the tables named in INDEX_NAMES.
+    """
+    # reload so we start from the tables as written, since the expansion below is done in place
+    modules = [
+        importlib.reload(importlib.import_module(module)) for module in WORKS_MODULES
+    ]
+    tables = [
+        (
+            _works_table(module, "AUTH_URNS"),
+            _works_table(module, "WORK_URNS"),
+            _works_table(module, "AUTH_ABB"),
         )
-        for transform in _transform_title(title, prev_titles):
-            if not additions.get(author):
-                additions[author] = {transform: WORK_URNS[author][title]}
-            else:
-                additions[author][transform] = WORK_URNS[author][title]
+        for module in modules
+    ]
+
+    # check for duplicate keys between each pair of greek, latin, other and schol works
+    for (i, first), (j, second) in itertools.combinations(enumerate(tables), 2):
+        for first_table, second_table in zip(first, second):
+            assert not set(first_table.keys()).intersection(
+                second_table.keys()
+            ), f"{WORKS_MODULES[i]} and {WORKS_MODULES[j]} share keys"
+
+    auth_urns = {}
+    auth_abb = {}
+    work_urns = {}
+    single_work_authors = set()
+    for module, (module_auth_urns, module_work_urns, module_auth_abb) in zip(
+        modules, tables
+    ):
+        auth_urns |= module_auth_urns
+        work_urns |= module_work_urns
+        auth_abb |= module_auth_abb
+        single_work_authors |= _works_table(module, "SINGLE_WORK_AUTHORS") or set()
+
+    additions = {}
+
+    for author in work_urns.keys():
+        for title in work_urns[author].keys():
+            prev_titles = list(additions.get(author, {}).keys()) + list(
+                work_urns[author].keys()
+            )
+            for transform in _transform_title(title, prev_titles):
+                if not additions.get(author):
+                    additions[author] = {transform: work_urns[author][title]}
+                else:
+                    additions[author][transform] = work_urns[author][title]
+
+    for author in additions.keys():
+        for title in additions[author].keys():
+            work_urns[author][title] = additions[author][title]
+
+    return {
+        "AUTH_URNS": auth_urns,
+        "AUTH_ABB": auth_abb,
+        "WORK_URNS": work_urns,
+        "SINGLE_WORK_AUTHORS": single_work_authors,
+        "AUTHORS": set(auth_urns.keys()),
+        "CITATION_INDEX": CitationIndex(auth_abb, auth_urns, work_urns),
+    }
+
+
+def _share_work_tables(work_urns: dict) -> None:
+    # build_index expands the per-author dicts of the works_* tables in place, and functions
+    # like _which_seneca in works_latin look titles up there, so point them at the expanded
+    # dicts again after loading a pickled index
+    for module in WORKS_MODULES:
+        table = _works_table(importlib.import_module(module), "WORK_URNS")
+        for author in table.keys():
+            table[author] = work_urns[author]
+
+
+def _index_hash() -> str:
+    digest = hashlib.sha256(str(INDEX_VERSION).encode())
+    for source in INDEX_SOURCES:
+        digest.update((pathlib.Path(__file__).parent / source).read_bytes())
+    return digest.hexdigest()
+
+
+def load_index(rebuild: bool = False) -> dict:
+    """
+    Loads the expanded index from INDEX_FILE if it was built from the current works tables,
+    otherwise builds it with build_index and saves it for later runs.
+    """
+    index_hash = _index_hash()
+    if not rebuild and INDEX_FILE.exists():
+        with open(INDEX_FILE, "rb") as f:
+            # the header is pickled separately so a stale index is detected without loading it
+            header = pickle.load(f)
+            if header == {"version": INDEX_VERSION, "hash": index_hash}:
+                index = pickle.load(f)
+                _share_work_tables(index["WORK_URNS"])
+                return index
+        logging.info(f"{INDEX_FILE} is out of date, rebuilding.")
+
+    index = build_index()
+    tmp_file = INDEX_FILE.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_file, "wb") as f:
+        pickle.dump({"version": INDEX_VERSION, "hash": index_hash}, f)
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    # replace atomically so concurrent converters never read a partial index
+    os.replace(tmp_file, INDEX_FILE)
+    return index
+
+
+def _ensure_index() -> None:
+    if "CITATION_INDEX" not in globals():
+        globals().update(load_index())
+
+
+def __getattr__(name: str):
+    # load the index lazily, so importing this module doesn't pay for it
+    if name in INDEX_NAMES:
+        _ensure_index()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _first_of(*patterns: str) -> re.Pattern:
+    """
+    Combines patterns into one regex, used with .match(), where the first pattern found
+    anywhere in the string wins. This is the same result as trying re.search with each
+    pattern in turn, but in one call. The match for patterns[i] is the group "rank{i}".
+    """
+    return re.compile(
+        "|".join(
+            f"(?=(?s:.*?)(?P<rank{i}>{pattern}))" for i, pattern in enumerate(patterns)
+        )
+    )
+
 
-for author in additions.keys():
-    for title in additions[author].keys():
-        WORK_URNS[author][title] = additions[author][title]
+def _ranked_search(
+    ranked: re.Pattern, string: str
+) -> tuple[Optional[int], Optional[str]]:
+    """(rank of the first pattern found, its match) for a regex built by _first_of"""
+    match = ranked.match(string)
+    if match is None:
+        return None, None
+    return int(match.lastgroup[len("rank") :]), match.group(match.lastgroup)
+
+
+URN_PATTERNS = _first_of(
+    r"tlg\d+\.tlg\d+(:\d+.?\d*)?(ff)?",
+    r"phi\d+\.phi\d+(:\d+.?\d*)?(ff)?",
+    r"stoa\d+\.stoa\d+(:\d+.?\d*)?(ff)?",
+)
+
+# preferred forms of a ref, best first
+REF_PATTERNS = _first_of(
+    # the best case, where we have at least 2 alphabetic strings followed by two numeric strings
+    # this can get refs of format Dion. Hal. Rom. ant. 2.2, with author and work as bigrams
+    r"([a-zA-Z]+\.?\s?[a-zA-Z]*) ([a-zA-Z]+\.?\s?[a-zA-Z]*) \d+(\s|\.|:)\d+",
+    # second best has two strings followed by one numeric string
+    r"([a-zA-Z]+\.?\s?[a-zA-Z]*) ([a-zA-Z]+\.?\s?[a-zA-Z]*) \d+",
+    # third best has one alphabetic string followed by two numeric strings,
+    # and captures cases where the work is given by a numeral
+    r"([a-zA-Z]+\.?) \d+(\s|\.|:)\d+",
+    # This captures something like Bion 20, where Bion can be presumed to ref to
+    # his main surviving work, the Lament for Adonis, and 20 to he line number
+    r"([a-zA-Z]+\.?) \d+",
+)
+
+# cleanup done by get_ref on both from_n and from_bibl, in this order:
+# drop <title> tags and parentheses,
+TITLE_TAG_OR_PAREN = re.compile(r"<title.*?>|[\(\)]")
+# then (after dropping "</title>" and commas) deal with section symbols, and with spacing
+# issues with alphabetic page/section references (e.g. with Stephanus pages)
+SECTION_OR_ALPHA_LOC = re.compile(r"(?P<section> *§ *)|(\d+) ([A-Za-z])")
+
+LOC_START = re.compile(r"\d+.*")
+LOC_SEPARATORS = re.compile(r"[\s,.:]")
+LOC_RANGE = re.compile(r"(\d+)[–-—]{1}(\d+)")
+SPACED_LOC = re.compile(r"\d\.?\s\d")
+SPACED_LOC_AFTER_DOT = re.compile(r"(\d\.)\s(\d)")
+SPACED_LOC_DIGITS = re.compile(r"(\d)\s(\d)")
+
+
+def _clean_ref(ref: str) -> str:
+    ref = TITLE_TAG_OR_PAREN.sub("", ref)
+    ref = ref.replace("</title>", "").replace(", ", " ")
+    return SECTION_OR_ALPHA_LOC.sub(
+        lambda match: "." if match.group("section") else match.group(2) + match.group(3),
+        ref,
+    )
 
 
 def _detect_urn(ref) -> Optional[str]:
-    match = re.search(r"tlg\d+\.tlg\d+(:\d+.?\d*)?(ff)?", ref)
-    if match:
-        return match.group(0)
-    match = re.search(r"phi\d+\.phi\d+(:\d+.?\d*)?(ff)?", ref)
-    if match:
-        return match.group(0)
-    match = re.search(r"stoa\d+\.stoa\d+(:\d+.?\d*)?(ff)?", ref)
-    if match:
-        return match.group(0)
-    return
+    return _ranked_search(URN_PATTERNS, ref)[1]
 
 
 def _res_ordered_works(
@@ -377,29 +641,11 @@ def get_ref(
     compares them, evaluates which better fits the desired citation format,
     cleans this string, and returns it. Returns None if no viable ref found.
     """
+    _ensure_index()
     if isinstance(from_n, str):
-        from_n = from_n.lower().strip()
+        from_n = _clean_ref(from_n.lower().strip())
     if isinstance(from_bibl, str):
-        from_bibl = from_bibl.lower().strip()
-
-    # process in list form to apply same operations to both from_bibl and from_n
-    refs = [from_n, from_bibl]
-    refs = [
-        re.sub("<title.*?>", "", ref) if isinstance(ref, str) else ref for ref in refs
-    ]
-    refs = [re.sub(r"[\(\)]", "", ref) if isinstance(ref, str) else ref for ref in refs]
-    refs = [
-        ref.replace("</title>", "") if isinstance(ref, str) else ref for ref in refs
-    ]
-    refs = [ref.replace(", ", " ") if isinstance(ref, str) else ref for ref in refs]
-    # deal with section symbols
-    refs = [re.sub(r" *§ *", ".", ref) if isinstance(ref, str) else ref for ref in refs]
-    # deal with spacing issues with alphabetic page/section references (e.g. with Stephanus pages)
-    refs = [
-        re.sub(r"(\d+) ([A-Za-z])", r"\1\2", ref) if isinstance(ref, str) else ref
-        for ref in refs
-    ]
-    from_n, from_bibl = refs
+        from_bibl = _clean_ref(from_bibl.lower().strip())
 
     # early return conditions
     if not isinstance(from_bibl, str) or not from_bibl.strip():
@@ -411,58 +657,26 @@ def get_ref(
     if _detect_urn(from_n):
         return from_n
 
-    # check if at least one string begins with the best case
-    # where we have at least 2 alphabetic strings followed by two numeric strings
-    # this can get refs of format Dion. Hal. Rom. ant. 2.2, with author and work as bigrams
-    best_pattern = (
-        r"([a-zA-Z]+\.?\s?[a-zA-Z]*) ([a-zA-Z]+\.?\s?[a-zA-Z]*) \d+(\s|\.|:)\d+"
-    )
-    # second_best has two strings followed by one numeric string
-    second_best = r"([a-zA-Z]+\.?\s?[a-zA-Z]*) ([a-zA-Z]+\.?\s?[a-zA-Z]*) \d+"
-    # third_best has one alphabetic string followed by two numeric strings,
-    # and captures cases where the work is given by a numeral
-    third_best = r"([a-zA-Z]+\.?) \d+(\s|\.|:)\d+"
-    # This captures something like Bion 20, where Bion can be presumed to ref to
-    # his main surviving work, the Lament for Adonis, and 20 to he line number
-    fourth_best = r"([a-zA-Z]+\.?) \d+"
-
-    patterns = (best_pattern, second_best, third_best, fourth_best)
-    ref = None
-
     # the basic idea here is:
-    # we take the best pattern, and if a given pattern matches from_n and from_n has
+    # we take the best of REF_PATTERNS, and if a given pattern matches from_n and from_n has
     # a recognized author, we from_n. If not, we do the same check on from_bibl, and if it
     # matches, we return from_bibl. We then do the same for the other patterns in order.
     # If no pattern matches, we instead simply try to identify an author in one of
     # from_n and from_bibl.
+    # So whichever of from_n and from_bibl (with a recognized author) matches the better
+    # pattern wins, with from_n winning ties.
+    ref = None
 
-    for pattern in patterns:
-        if re.search(pattern, from_n):
-            split = from_n.split()
-            # check that author is recognized, up to trigram
-            if AUTH_ABB.get(split[0]) or split[0] in AUTHORS:
-                ref = from_n
-                break
-            elif AUTH_ABB.get(" ".join(split[:2])) or " ".join(split[:2]) in AUTHORS:
-                ref = from_n
-                break
-            elif AUTH_ABB.get(" ".join(split[:3])) or " ".join(split[:3]) in AUTHORS:
-                ref = from_n
-                break
-        # at this point, we know that from_n either does not fit pattern, or has unrecognized author
-        # so we do the same check on from_bibl
-        if re.search(pattern, from_bibl):
-            split = from_bibl.split()
-            # check that author is recognized, up to trigram
-            if AUTH_ABB.get(split[0]) or split[0] in AUTHORS:
-                ref = from_bibl
-                break
-            elif AUTH_ABB.get(" ".join(split[:2])) or " ".join(split[:2]) in AUTHORS:
-                ref = from_bibl
-                break
-            elif AUTH_ABB.get(" ".join(split[:3])) or " ".join(split[:3]) in AUTHORS:
-                ref = from_bibl
-                break
+    # author recognition only depends on the string, so do it once rather than per pattern
+    n_auth = CITATION_INDEX.match_author(from_n.split())
+    bibl_auth = CITATION_INDEX.match_author(from_bibl.split())
+
+    n_rank = _ranked_search(REF_PATTERNS, from_n)[0] if n_auth else None
+    bibl_rank = _ranked_search(REF_PATTERNS, from_bibl)[0] if bibl_auth else None
+    if n_rank is not None and (bibl_rank is None or n_rank <= bibl_rank):
+        ref = from_n
+    elif bibl_rank is not None:
+        ref = from_bibl
 
     # organized this way so more checks could easily be added
     if ref:
@@ -470,69 +684,20 @@ def get_ref(
 
     # at this point, none of the desired patterns have been recognized
     # check if either or both strings have a recognized author
-    n_auth_rec = False
-    bibl_auth_rec = False
-    auth_form_from_n = ""  # so we can try to match work
-    auth_form_from_bibl = ""
-
-    split = from_n.split()
-    if AUTH_ABB.get(split[0]) or split[0] in AUTHORS:
-        n_auth_rec = True
-        auth_form_from_n = split[0]
-    elif AUTH_ABB.get(" ".join(split[:2])) or " ".join(split[:2]) in AUTHORS:
-        n_auth_rec = True
-        auth_form_from_n = " ".join(split[:2])
-    elif AUTH_ABB.get(" ".join(split[:3])) or " ".join(split[:3]) in AUTHORS:
-        n_auth_rec = True
-        auth_form_from_n = " ".join(split[:3])
-
-    split = from_bibl.split()
-    if AUTH_ABB.get(split[0]) or split[0] in AUTHORS:
-        bibl_auth_rec = True
-        auth_form_from_bibl = split[0]
-    elif AUTH_ABB.get(" ".join(split[:2])) or " ".join(split[:2]) in AUTHORS:
-        bibl_auth_rec = True
-        auth_form_from_bibl = " ".join(split[:2])
-    elif AUTH_ABB.get(" ".join(split[:3])) or " ".join(split[:3]) in AUTHORS:
-        bibl_auth_rec = True
-        auth_form_from_bibl = " ".join(split[:3])
-
-    if n_auth_rec and not bibl_auth_rec:
+    if n_auth and not bibl_auth:
         return from_n
-    if bibl_auth_rec and not n_auth_rec:
+    if bibl_auth and not n_auth:
         return from_bibl
 
     # if both have a recognized author, determine which has a recognized work
-    if n_auth_rec and bibl_auth_rec:
-        if auth_form_from_n in AUTHORS:
-            auth = auth_form_from_n
-        else:
-            auth = AUTH_ABB.get(auth_form_from_n, "")
-        split = from_n[len(auth_form_from_n) :].split()
-        auth_space = WORK_URNS.get(auth)
-        if auth_space:
-            # check for work up to trigram
-            if len(split) > 0 and auth_space.get(split[0]):
-                return from_n
-            elif len(split) > 1 and auth_space.get(" ".join(split[:2])):
-                return from_n
-            elif len(split) > 2 and auth_space.get(" ".join(split[:3])):
-                return from_n
-
-        if auth_form_from_bibl in AUTHORS:
-            auth = auth_form_from_bibl
-        else:
-            auth = AUTH_ABB.get(auth_form_from_bibl, "")
-        split = from_bibl[len(auth_form_from_bibl) :].split()
-        auth_space = WORK_URNS.get(auth)
-        if auth_space:
-            # check for work up to trigram
-            if len(split) > 0 and auth_space.get(split[0]):
-                return from_bibl
-            elif len(split) > 1 and auth_space.get(" ".join(split[:2])):
-                return from_bibl
-            elif len(split) > 2 and auth_space.get(" ".join(split[:3])):
-                return from_bibl
+    if n_auth and bibl_auth:
+        # check for work up to trigram
+        end, _, auth = n_auth
+        if CITATION_INDEX.match_work(auth, from_n.split(), start=end, limit=3):
+            return from_n
+        end, _, auth = bibl_auth
+        if CITATION_INDEX.match_work(auth, from_bibl.split(), start=end, limit=3):
+            return from_bibl
 
     warning_msg = (
         f"Problem where n attribute is\n{from_n}\nand bibl element is\n{from_bibl}\n"
@@ -548,6 +713,7 @@ def get_urn(
 ) -> Optional[str]:
     if not ref:
         return
+    _ensure_index()
 
     # for now, keep ff in references to line numbers,
     # but remove " " and "." to make it easier to process
@@ -565,7 +731,7 @@ def get_urn(
     urn_if_urn = _detect_urn(ref)
     if urn_if_urn:
         loc = ref[ref.index(urn_if_urn) + len(urn_if_urn) :]
-        loc_match = re.search(r"\d+.*", loc)
+        loc_match = LOC_START.search(loc)
         loc = loc_match.group(0) if loc_match else ""
         if "tlg" in urn_if_urn:
             if "urn:cts:greeklit" not in urn_if_urn:
@@ -582,39 +748,32 @@ def get_urn(
     # idea is that SINGLE_WORK_AUTHORS will only be used if the work cannot be identified by name
     as_one_book_auth = False
     split = ref.split()
-    auth = split[0].lower()
-    auth = AUTH_ABB.get(auth, auth)
-    pos_after_auth = 1
     # deal with bigram author name, trigram, etc
-    while auth not in AUTH_URNS.keys() and not callable(auth):
-        pos_after_auth += 1
-        # only try to match author name up to quadrigram
-        if pos_after_auth == 5:
-            break
-        auth = " ".join(split[:pos_after_auth]).lower()
-        auth = AUTH_ABB.get(auth, auth)
+    # only try to match author name up to quadrigram
+    auth_match = CITATION_INDEX.match_urn_author([term.lower() for term in split])
 
     # some auth strings are mapped to functions in AUTH_ABB
-    if auth not in AUTH_URNS.keys() and not callable(auth):
+    if auth_match is None:
+        auth = " ".join(split[:4]).lower()
+        auth = AUTH_ABB.get(auth, auth)
         logging.warning(
             f"Author not recognized for {auth}\n\nThe xml context, if available, is: {content}.\n\nFilename, if available, is: {filename}"
         )
         return  # failure case
+    pos_after_auth, _, auth = auth_match
 
     # this deals with references to a work name for an author mainly known for one work
-    while auth in SINGLE_WORK_AUTHORS:
+    if auth in SINGLE_WORK_AUTHORS:
         as_one_book_auth = True
-        if auth not in WORK_URNS.keys():
-            break
-        if len(split) <= 1:
-            break
-
-        for i in range(1, len(split) - pos_after_auth):
-            term = "_".join(split[pos_after_auth : pos_after_auth + i])
-            if WORK_URNS[auth].get(term):
+        if auth in WORK_URNS.keys() and len(split) > 1:
+            if CITATION_INDEX.match_work(
+                auth,
+                split,
+                start=pos_after_auth,
+                limit=len(split) - pos_after_auth - 1,
+                underscored=True,
+            ):
                 as_one_book_auth = False
-                break
-        break
     # deal with authors known solely/primary from single work,
     # so that they are cited without ref to specific work
     # code above identifies whether the citation should be treated this way
@@ -623,12 +782,12 @@ def get_urn(
         work = "tlg001"
         numerics = []
         term = ""
-        for term in re.split(r"[\s,.:]", ref[pos_after_auth:]):
+        for term in LOC_SEPARATORS.split(ref[pos_after_auth:]):
             if term.isnumeric():
                 numerics.append(term)
         # deal with dashes in loc
-        if re.search(r"\d+[–-—]{1}\d+", term):
-            numerics.append(re.sub(r"(\d+)[–-—]{1}(\d+)", r"\1-\2", term))
+        if LOC_RANGE.search(term):
+            numerics.append(LOC_RANGE.sub(r"\1-\2", term))
         elif "ff" in term:
             numerics[-1] += "ff"
         loc = ".".join(numerics)
@@ -689,19 +848,23 @@ def get_urn(
                 f"Author not recognized for {ref}.\nContents, if available: {content}.\nFilename, if available: {filename}."
             )
             return  # failure case
-        for i in range(pos_after_auth + 1, len(ref.split())):
-            if WORK_URNS[auth].get("_".join(ref.split()[pos_after_auth:i]).lower()):
-                ref = ref.replace(
-                    " ".join(ref.split()[1:i]), "_".join(ref.split()[1:i])
-                )
-                break
+        work_match = CITATION_INDEX.match_work(
+            auth,
+            [term.lower() for term in ref.split()],
+            start=pos_after_auth,
+            limit=len(ref.split()) - pos_after_auth - 1,
+            underscored=True,
+        )
+        if work_match:
+            i = work_match[0]
+            ref = ref.replace(" ".join(ref.split()[1:i]), "_".join(ref.split()[1:i]))
 
     # now, deal with cases where there are spaces between digits giving location in text
     # if there was somehow an author form with a number in it, it would have been replaced by a
     # nonnumeric form by this point
-    while re.search(r"\d\.?\s\d", ref):
-        ref = re.sub(r"(\d\.)\s(\d)", r"\1\2", ref)
-        ref = re.sub(r"(\d)\s(\d)", r"\1\.\2", ref)
+    while SPACED_LOC.search(ref):
+        ref = SPACED_LOC_AFTER_DOT.sub(r"\1\2", ref)
+        ref = SPACED_LOC_DIGITS.sub(r"\1\.\2", ref)
 
     # greatest possible ref length: author bigram + work + loc
     if len(ref.split()) not in (2, 3, 4):
@@ -749,15 +912,15 @@ def get_urn(
         numerics = []
         term = ""
         numeric_count = 0
-        for term in re.split(r"[\s,.:]", ref[pos_after_auth:]):
+        for term in LOC_SEPARATORS.split(ref[pos_after_auth:]):
             if term.isnumeric():
                 if numeric_count == 0:
                     numeric_count += 1
                     continue  # skip numeric term that specifies which work in collection
                 numerics.append(term)
         # deal with dashes in loc
-        if re.search(r"\d+[–-—]{1}\d+", term):
-            numerics.append(re.sub(r"(\d+)[–-—]{1}(\d+)", r"\1-\2", term))
+        if LOC_RANGE.search(term):
+            numerics.append(LOC_RANGE.sub(r"\1-\2", term))
         elif "ff" in term:
             numerics[-1] += "ff"
         loc = ".".join(numerics)
@@ -814,10 +977,102 @@ def get_urn(
     return urn
 
 
+class ResolutionCache:
+    """
+    Memoizes get_ref -> get_urn on the (from_n, from_bibl) pair, normalized the way
+    get_ref normalizes it, and counts hits and misses. Unbounded by default, or LRU
+    with `maxsize`. If `path` is given, resolutions are loaded from and saved to that
+    file (on save() or leaving the context manager), so reruns only resolve new
+    citations; the file is discarded if it was made from a different index.
+
+    get_urn only logs its warnings on a miss, so a repeated failure is logged once.
+    """
+
+    def __init__(
+        self, path: Optional[pathlib.Path] = None, maxsize: Optional[int] = None
+    ):
+        self.path = path
+        self.maxsize = maxsize
+        self.entries: collections.OrderedDict = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if path is not None and path.exists():
+            with open(path, "rb") as f:
+                header = pickle.load(f)
+                if header == {"version": INDEX_VERSION, "hash": _index_hash()}:
+                    self.entries.update(pickle.load(f))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.save()
+
+    @staticmethod
+    def key(
+        from_n: Optional[str], from_bibl: Optional[str]
+    ) -> tuple[Optional[str], Optional[str]]:
+        return tuple(
+            ref.lower().strip() if isinstance(ref, str) else ref
+            for ref in (from_n, from_bibl)
+        )
+
+    def resolve(
+        self,
+        from_n: Optional[str],
+        from_bibl: Optional[str],
+        content: Optional[str] = None,
+        filename: Optional[str] = None,
+    ) -> tuple[Optional[str], Optional[str]]:
+        """Returns (ref, urn) as get_ref and get_urn would."""
+        key = self.key(from_n, from_bibl)
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        self.misses += 1
+        ref = get_ref(*key)
+        resolution = (ref, get_urn(ref, content=content, filename=filename))
+        self.entries[key] = resolution
+        if self.maxsize is not None and len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return resolution
+
+    def merge(self, other: "ResolutionCache") -> None:
+        """Adds the resolutions and counts of another cache, e.g. one returned by a worker process."""
+        self.entries.update(other.entries)
+        self.hits += other.hits
+        self.misses += other.misses
+        if self.maxsize is not None:
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.entries),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_file, "wb") as f:
+            pickle.dump({"version": INDEX_VERSION, "hash": _index_hash()}, f)
+            pickle.dump(dict(self.entries), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, self.path)
+
+
 if __name__ == "__main__":
     # run module as script to output a text file with all
     # title forms and author abbreviations, both as specified explicitly
     # and as automatically generated
+    # this also (re)builds the cached index in INDEX_FILE
+    globals().update(load_index(rebuild=True))
     with open("title_forms.txt", "w") as f:
         for auth in WORK_URNS.keys():
             f.write(f"___{auth}___\n")
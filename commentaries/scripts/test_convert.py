@@ -0,0 +1,71 @@
+import json
+
+import jsonlines
+
+import convert_ot_cit
+from ref_to_urn import CitationSink
+
+TEI_COMMENTARY = """<TEI xmlns="http://www.tei-c.org/ns/1.0">
+<teiHeader/>
+<text><body><div type="commentary">
+<div type="textpart" corresp="urn:cts:greekLit:tlg0011.tlg004:1">
+<p>cp. <cit><bibl n="Hom. Od. 4.66">Od. 4.66</bibl><quote>ἀλλ᾽</quote></cit>
+and <cit><bibl n="Soph. O.T. 220">O.T. 220</bibl><quote>οὐ γὰρ</quote></cit></p>
+</div>
+<div type="textpart" corresp="urn:cts:greekLit:tlg0011.tlg004:2">
+<p>as in <cit><bibl n="Hom. Il. 1.1">Il. 1.1</bibl><quote>μῆνιν</quote></cit></p>
+</div>
+</div></body></text>
+</TEI>
+"""
+
+
+def test_convert_commentary_resolves_once(tmp_path, monkeypatch):
+    src = tmp_path / "commentary.xml"
+    src.write_text(TEI_COMMENTARY, encoding="utf-8")
+    calls = []
+    get_ref = convert_ot_cit.get_ref
+
+    def counting_get_ref(from_n, from_bibl):
+        calls.append(from_n)
+        return get_ref(from_n, from_bibl)
+
+    monkeypatch.setattr(convert_ot_cit, "get_ref", counting_get_ref)
+
+    with CitationSink(
+        tmp_path / "resolved.jsonl", tmp_path / "unresolved.jsonl"
+    ) as sink:
+        count = convert_ot_cit.convert_commentary(
+            src, tmp_path / "out", "urn:cts:greekLit:test", None, sink=sink
+        )
+
+    assert count == 2
+    assert calls == ["Hom. Od. 4.66", "Soph. O.T. 220", "Hom. Il. 1.1"], calls
+    with open(tmp_path / "out" / "glossae_001.jsonl") as f:
+        entries = [json.loads(line) for line in f]
+    assert [len(entry["citations"]) for entry in entries] == [2, 1]
+    assert entries[1]["citations"][0]["urn"] == "urn:cts:greekLit:test:citations-2.2"
+    with jsonlines.open(tmp_path / "resolved.jsonl") as f:
+        assert len(list(f)) == 3
+
+
+def test_extract_citations_from_element(tmp_path):
+    src = tmp_path / "commentary.xml"
+    src.write_text(TEI_COMMENTARY, encoding="utf-8")
+    urn_prefix = "urn:cts:greekLit:test"
+    with CitationSink(
+        tmp_path / "resolved.jsonl", tmp_path / "unresolved.jsonl"
+    ) as sink:
+        for idx, ((_, content), (_, el)) in enumerate(
+            zip(
+                convert_ot_cit.get_glossae(src, None),
+                convert_ot_cit.iter_glossae(src, None, as_element=True),
+            )
+        ):
+            from_xml = convert_ot_cit.extract_citations(
+                content, idx, {"count": 1}, urn_prefix, sink=sink
+            )
+            from_el = convert_ot_cit.extract_citations(
+                el, idx, {"count": 1}, urn_prefix, sink=sink
+            )
+            assert from_el == from_xml, from_el
@@ -1,4 +1,12 @@
-from ref_to_urn import get_ref, get_urn
+import jsonlines
+
+from ref_to_urn import (
+    get_ref,
+    get_urn,
+    CitationSink,
+    ResolutionCache,
+    CITATION_INDEX,
+)
 
 
 def test_get_ref():
@@ -69,3 +77,38 @@ def test_detect_urn():
     ref = get_ref(n, bibl)
     urn = get_urn(ref)
     assert urn == "urn:cts:greekLit:tlg5037.tlg006.perseus-grc2:72", urn
+
+
+def test_index_match():
+    match = CITATION_INDEX.match("dion. hal. antiquitates romanae 2.2".split())
+    assert match == ("dionysius", "tlg001", 3), match
+
+
+def test_citation_sink(tmp_path):
+    resolved = tmp_path / "resolved.jsonl"
+    unresolved = tmp_path / "unresolved.jsonl"
+    for shard in ("viaf002", "viaf001"):
+        with CitationSink(resolved, unresolved, batch_size=2, shard=shard) as sink:
+            for i in range(3):
+                sink.write("hom. il. 1.1", None, "Il. 1.1", "urn", "", "<p/>", shard, i)
+            sink.write(None, None, "Il.", None, "", "<p/>", shard, 3)
+    CitationSink.merge_shards(["viaf001", "viaf002"], resolved, unresolved)
+    with jsonlines.open(resolved) as f:
+        records = [(r["filename"], r["doc_cit_urn"]) for r in f]
+    expected = [(shard, i) for shard in ("viaf001", "viaf002") for i in range(3)]
+    assert records == expected, records
+    with jsonlines.open(unresolved) as f:
+        assert [r["urn"] for r in f] == ["", ""]
+    assert not (tmp_path / "shards" / "resolved.viaf001.jsonl").exists()
+
+
+def test_resolution_cache(tmp_path):
+    path = tmp_path / "resolutions.pickle"
+    with ResolutionCache(path) as resolver:
+        first = resolver.resolve("Hom. Od. 4.66", "Od. 4.66")
+        assert resolver.resolve(" hom. od. 4.66", "OD. 4.66") == first
+        assert first == ("hom. od. 4.66", get_urn("hom. od. 4.66"))
+        assert (resolver.hits, resolver.misses) == (1, 1)
+    resolver = ResolutionCache(path)
+    assert resolver.resolve("Hom. Od. 4.66", "Od. 4.66") == first
+    assert resolver.stats()["hits"] == 1
@@ -5,11 +5,12 @@ import re
 
 from collections import Counter
 from pathlib import Path
+from typing import Optional
 
 from lxml import etree
 
 from convert_ot_cit import to_xml
-from ref_to_urn import get_ref, get_urn
+from ref_to_urn import get_ref, get_urn, ResolutionCache, RESOLUTION_CACHE_FILE
 
 NAMESPACES = {
     "tei": "http://www.tei-c.org/ns/1.0",
@@ -23,7 +24,9 @@ LOGGER = logging.getLogger(__name__)
 BASE_URN = "urn:cts:greekLit:tlg0011.tlg004"
 
 
-def convert(tree: etree._ElementTree, filename: str):
+def convert(
+    tree: etree._ElementTree, filename: str, resolver: Optional[ResolutionCache] = None
+):
     commentary_urn = "urn:cts:greekLit:viaf2603144.viaf004.perseus-eng1"
     citation_index = 0
 
@@ -47,22 +50,32 @@ def convert(tree: etree._ElementTree, filename: str):
                     quote = " ".join(cit.xpath("./tei:quote/text()", namespaces=NAMESPACES))  # type: ignore
                     bibl = cit.find("./tei:bibl", namespaces=NAMESPACES)
                     ref = ""
+                    urn = None
 
                     if bibl is not None:
                         bibl_n = bibl.get("n", "")
                         bibl_text = etree.tostring(
                             bibl, encoding="unicode", method="text"
                         )
-                        ref = get_ref(bibl_n, bibl_text)
+                        if resolver is not None:
+                            ref, urn = resolver.resolve(
+                                bibl_n,
+                                bibl_text,
+                                content=to_xml(glossa),
+                                filename=filename,
+                            )
+                        else:
+                            ref = get_ref(bibl_n, bibl_text)
+                            urn = get_urn(
+                                ref, content=to_xml(glossa), filename=filename
+                            )
 
                     citation = {
                         "urn": f"{commentary_urn}:citations-{citation_index}.{len(citations) + 1}",
                         "data": {
                             "quote": quote,
                             "ref": ref,
-                            "urn": get_urn(
-                                ref, content=to_xml(glossa), filename=filename
-                            ),
+                            "urn": urn,
                         },
                     }
 
@@ -104,9 +117,10 @@ def main():
     with open(
         "./test-data/commentaries/viaf2603144.viaf004.perseus-eng1/glossae_001.jsonl",
         "w",
-    ) as outfile:
-        for entry in convert(tree, str(filename)):
+    ) as outfile, ResolutionCache(RESOLUTION_CACHE_FILE) as resolver:
+        for entry in convert(tree, str(filename), resolver=resolver):
             print(json.dumps(entry, ensure_ascii=False), file=outfile)
+        LOGGER.info(f"citation resolutions: {resolver.stats()}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+
+"""
+Word-level alignment of the Crito treebank (wegner-corrected-treebank.csv) with the
+Persian translations of its words, located among the tokens of the Persian sentences
+in wegner-corrected-finalized-versions.csv.
+
+    ./aligner.py --tsv alignment.tsv --json alignment.json
+
+aligns every translation column, one worker per column, and writes the alignments
+in the format of crito-alignment.tsv and crito-shamsian-word-alignment.json.
+"""
+
+import argparse
+import csv
+import json
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from subsequence_matcher import TokenIndex
+
+TRANSLATION_COLUMNS = [
+    "Primary translation",
+    "Literal translation",
+    "Secondary translation",
+]
+
+GREEK_WORD_FIX = {
+    ",προτιθέντων": "προτιθέντων",
+}
+
+# treebank forms that are not words of the Greek sentence
+SKIPPED_FORMS = {"[0]", "[1]", "[2]", "[3]", "[4]", "—"}
+
+PERSIAN_PUNCTUATION = "،؟.:«»![]؛"
+
+SENTENCE_231 = "σὺ δὲ οὔτε Λακεδαίμονα προῃροῦ οὔτε Κρήτην, ἃς δὴ ἑκάστοτε φῂς εὐνομεῖσθαι, οὔτε ἄλλην οὐδεμίαν τῶν Ἑλληνίδων πόλεων οὐδὲ τῶν βαρβαρικῶν, ἀλλὰ ἐλάττω ἐξ αὐτῆς ἀπεδήμησας ἢ οἱ χωλοί τε καὶ τυφλοὶ καὶ οἱ ἄλλοι ἀνάπηροι·"
+
+PERSIAN_TEXT_PATH = "../../library/tlg0059/tlg003/tlg0059.tlg003.perseus-far1.txt"
+
+ALIGNMENT_URN = "urn:cite2:scaife-viewer:alignment.v1:crito-shamsian-word-alignment"
+ALIGNMENT_LABEL = "Crito Greek / Farsi Word Alignment"
+GREEK_VERSION = "urn:cts:greekLit:tlg0059.tlg003.perseus-grc2b1:"
+PERSIAN_VERSION = "urn:cts:greekLit:tlg0059.tlg003.perseus-far1:"
+
+
+def normalize_greek(text):
+    text = text.replace("\u1fbd", "\u2019")
+    text = text.replace(":", "·")
+    return text
+
+
+def load_rows(filename):
+    with Path(filename).open(encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        rows = [r for r in reader]
+        return rows
+
+
+def cluster(pairs):
+    """Group (greek token, persian token) pairs into [greek tokens, persian tokens]."""
+    clusters = []
+    a_map = {}
+    b_map = {}
+    for a, b in pairs:
+        if a not in a_map and b not in b_map:
+            clusters.append([{a}, {b}])
+            a_map[a] = len(clusters) - 1
+            b_map[b] = len(clusters) - 1
+        elif a in a_map and b not in b_map:
+            clusters[a_map[a]][1].add(b)
+            b_map[b] = a_map[a]
+        elif a not in a_map and b in b_map:
+            clusters[b_map[b]][0].add(a)
+            a_map[a] = b_map[b]
+    return clusters
+
+
+@dataclass
+class AlignmentRecord:
+    """
+    A treebank word and where its translation in `column` was found, as 1-based
+    positions among the tokens of the Persian sentence. `matches` is None if the
+    word has no translation in `column` or it was not found.
+    """
+
+    column: str
+    sentence_id: str
+    word_id: str
+    greek_word: str
+    persian_tokens: list[str]
+    matches: Optional[list[int]] = None
+
+
+@dataclass
+class Mismatch:
+    """A treebank word that is not in its Greek sentence."""
+
+    sentence_id: str
+    word_id: str
+    greek_word: str
+
+
+class Aligner:
+    """
+    The treebank and the sentences of the finalized versions, each sentence
+    tokenized and indexed once, shared by the alignment of every column.
+    """
+
+    def __init__(
+        self,
+        table_path="wegner-corrected-finalized-versions.csv",
+        treebank_path="wegner-corrected-treebank.csv",
+    ):
+        self.greek_sentences = {}
+        self.persian_sentences = {}
+        for row in load_rows(table_path):
+            key = row["Title3"].split("|")[1].strip(".")
+            assert key not in self.greek_sentences
+            if key == "231":
+                self.greek_sentences["231"] = SENTENCE_231
+            else:
+                self.greek_sentences[key] = normalize_greek(row["Greek"])
+            self.persian_sentences[key] = row["Primary translation"].strip()
+
+        self.sentence_tokens = {
+            key: [token.strip(PERSIAN_PUNCTUATION) for token in sentence.split(" ")]
+            for key, sentence in self.persian_sentences.items()
+        }
+        self.token_indexes = {
+            key: TokenIndex(tokens) for key, tokens in self.sentence_tokens.items()
+        }
+
+        self.treebank = load_rows(treebank_path)
+        # (row, sentence_id, word_id, greek_word) for each treebank row
+        self.words = []
+        self.mismatches = []
+        for row in self.treebank:
+            sentence_id = row["word - ref"].split("|")[2]
+            word_id = row["word - ref"].split("|")[3]
+            greek_word = normalize_greek(row["word - form"])
+            greek_word = GREEK_WORD_FIX.get(greek_word, greek_word)
+            if greek_word not in SKIPPED_FORMS:
+                if greek_word not in self.greek_sentences[sentence_id]:
+                    self.mismatches.append(Mismatch(sentence_id, word_id, greek_word))
+            self.words.append((row, sentence_id, word_id, greek_word))
+
+    def align_column(self, column: str) -> list[AlignmentRecord]:
+        """
+        A record for every treebank word, in treebank order. A translation is
+        looked for first among the sentence tokens not yet matched to another word,
+        then among all of them.
+        """
+        records = []
+        tokens_used = defaultdict(set)
+        for row, sentence_id, word_id, greek_word in self.words:
+            record = AlignmentRecord(column, sentence_id, word_id, greek_word, [])
+            records.append(record)
+
+            persian_translation = row[column].strip()
+            if not persian_translation:
+                continue
+            record.persian_tokens = persian_translation.split(" ")
+            token_index = self.token_indexes[sentence_id]
+            matches = token_index.skip_substring(
+                record.persian_tokens, tokens_used[sentence_id]
+            )
+            if not matches:
+                matches = token_index.skip_substring(record.persian_tokens)
+            if matches:
+                record.matches = matches
+                tokens_used[sentence_id].update(matches)
+        return records
+
+    def align(self, columns=TRANSLATION_COLUMNS, jobs=None) -> dict:
+        """The records of each of `columns`, aligned in parallel."""
+        if jobs == 1 or len(columns) == 1:
+            return {column: self.align_column(column) for column in columns}
+        with ProcessPoolExecutor(jobs or len(columns)) as executor:
+            return dict(zip(columns, executor.map(self.align_column, columns)))
+
+    def format_records(self, records: list[AlignmentRecord]) -> str:
+        """
+        Each sentence with its numbered tokens, followed by each translated word,
+        its translation and the numbers of the tokens it matched, or X.
+        """
+        lines = []
+        shown = set()
+        for record in records:
+            if record.sentence_id not in shown:
+                shown.add(record.sentence_id)
+                tokens = enumerate(self.sentence_tokens[record.sentence_id], 1)
+                lines += [
+                    "",
+                    f"# {record.sentence_id}",
+                    self.persian_sentences[record.sentence_id],
+                    "  ".join(b + "{" + str(a) + "}" for a, b in tokens),
+                ]
+            if record.persian_tokens:
+                if record.matches:
+                    found = " ".join("{" + str(j) + "}" for j in record.matches)
+                else:
+                    found = "X"
+                lines.append(
+                    f"\t{record.word_id} {' '.join(record.persian_tokens)} {found}"
+                )
+        return "".join(f"{line}\n" for line in lines)
+
+    def write_tsv(
+        self, records: list[AlignmentRecord], path, greek_tokens_path="greek_tokens.tsv"
+    ):
+        """
+        Write `records` as crito-alignment.tsv is: for each sentence, the Greek words
+        translated by the same Persian tokens on one line, with those tokens.
+        """
+        greek_tokens = {}
+        with open(greek_tokens_path) as f:
+            for line in f:
+                sentence_id, word_id, token = line.strip().split("\t")
+                greek_tokens[sentence_id, word_id] = token
+
+        sentences = defaultdict(list)
+        for record in records:
+            if record.persian_tokens:
+                sentences[record.sentence_id].append(record)
+
+        with open(path, "w") as f:
+            for sentence_id, sentence_records in sentences.items():
+                print(file=f)
+                print(f"# sent_id = {sentence_id}", file=f)
+                word_ids = defaultdict(list)
+                persian = {}
+                for record in sentence_records:
+                    token_numbers = " ".join(str(j) for j in record.matches or [])
+                    persian[token_numbers] = " ".join(
+                        " ".join(record.persian_tokens).split()
+                    )
+                    word_ids[token_numbers].append(record.word_id)
+                for token_numbers, ids in word_ids.items():
+                    greek = " ".join(greek_tokens[sentence_id, i] for i in ids)
+                    print(
+                        " ".join(ids),
+                        token_numbers,
+                        greek,
+                        persian[token_numbers],
+                        sep="\t",
+                        file=f,
+                    )
+
+    def write_json(
+        self,
+        path,
+        column="Primary translation",
+        ref_map_path="map1.tsv",
+        persian_text_path=PERSIAN_TEXT_PATH,
+        urn=ALIGNMENT_URN,
+        label=ALIGNMENT_LABEL,
+    ):
+        """
+        Write an ATLAS standoff alignment between the Greek and Persian text parts,
+        as crito-shamsian-word-alignment.json is. `ref_map_path` maps each Greek
+        token of a text part to its treebank row; the tokens of the text part's
+        Persian translation equal to the row's translation in `column` are aligned
+        with it.
+        """
+        persian_positions = defaultdict(lambda: defaultdict(list))
+        with open(persian_text_path) as f:
+            for line in f:
+                ref, text = line.split(maxsplit=1)
+                for idx, token in enumerate(text.split(), 1):
+                    persian_positions[ref][token.strip("؟")].append(idx)
+
+        def get_record_data():
+            pairs = set()
+            prev = None
+            with open(ref_map_path) as f:
+                for line in f:
+                    ref, idx, line_num = line.strip().split()
+                    if prev is None or prev != ref:
+                        if prev is not None:
+                            for a, b in cluster(pairs):
+                                yield prev, a, b
+                        pairs = set()
+                        prev = ref
+                    for far_token in self.treebank[int(line_num)][column].split():
+                        for far_idx in persian_positions[ref][far_token]:
+                            pairs.add((int(idx), far_idx))
+            for a, b in cluster(pairs):
+                yield prev, a, b
+
+        record_urn = urn.replace(":alignment.v1:", ":alignment-record.v1:")
+        records = []
+        for idx, (ref, a, b) in enumerate(get_record_data()):
+            relations1 = [f"{GREEK_VERSION}{ref}t{i}" for i in a]
+            relations2 = [f"{PERSIAN_VERSION}{ref}t{i}" for i in b]
+            records.append(
+                {
+                    "urn": f"{record_urn}_{idx}",
+                    "relations": [relations1, relations2],
+                }
+            )
+
+        data = {
+            "urn": urn,
+            "label": label,
+            "format": "atlas-standoff-annotation",
+            "enable_prototype": True,
+            "versions": [GREEK_VERSION, PERSIAN_VERSION],
+            "records": records,
+        }
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--column",
+        action="append",
+        choices=TRANSLATION_COLUMNS,
+        help="align this column (may be repeated; default: all of them)",
+    )
+    parser.add_argument("-j", "--jobs", type=int, default=None)
+    parser.add_argument("--tsv", help="write the alignment of the first column here")
+    parser.add_argument(
+        "--json", help="write the ATLAS alignment of the first column here"
+    )
+    args = parser.parse_args()
+    columns = args.column or TRANSLATION_COLUMNS
+
+    aligner = Aligner()
+    for mismatch in aligner.mismatches:
+        print(
+            f"{mismatch.greek_word} {mismatch.sentence_id} is not in "
+            f"{aligner.greek_sentences[mismatch.sentence_id]}",
+            file=sys.stderr,
+        )
+
+    alignments = aligner.align(columns, args.jobs)
+    for column, records in alignments.items():
+        aligned = [record for record in records if record.persian_tokens]
+        found = sum(record.matches is not None for record in aligned)
+        print(f"{column}: {found} of {len(aligned)} translations found")
+
+    if args.tsv:
+        aligner.write_tsv(alignments[columns[0]], args.tsv)
+    if args.json:
+        aligner.write_json(args.json, columns[0])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+
+"""
+Writes the ATLAS standoff alignment of the Crito straight from the corrected token
+numbering, in place of merge.py's TSV and the conversion of that to JSON:
+
+    ./numbering_to_alignment.py crito-shamsian-word-alignment.json
+
+Each "# n" sentence of persian_token_numbering_corrected.txt lists the Persian
+tokens of sentence n, numbered, then a line for each treebank word with the numbers
+of the Persian tokens translating it. The treebank words of a sentence translated by
+the same Persian tokens become one alignment record. Greek words are resolved to the
+token URNs of map1.tsv, Persian token numbers to tokens of the sentence's text part,
+and anything that does not resolve or match the numbered tokens is reported.
+"""
+
+import argparse
+import json
+import re
+import sys
+from dataclasses import dataclass, field
+
+from aligner import (
+    ALIGNMENT_LABEL,
+    ALIGNMENT_URN,
+    GREEK_VERSION,
+    PERSIAN_VERSION,
+    load_rows,
+)
+
+NUMBERING_PATH = "persian_token_numbering_corrected.txt"
+
+# "{3}", and "{3" where a correction lost the closing brace
+TOKEN_NUMBER = re.compile(r"\{(\d+)\}?")
+NUMBERED_TOKEN = re.compile(r"(\S*?)\{(\d+)\}")
+ZWNJ = "\u200c"
+
+
+class TokenUrnIndex:
+    """
+    The token URNs of the Greek and Persian text parts, by treebank word and by
+    sentence token number.
+    """
+
+    def __init__(
+        self,
+        table_path="wegner-corrected-finalized-versions.csv",
+        treebank_path="wegner-corrected-treebank.csv",
+        ref_map_path="map1.tsv",
+    ):
+        # sentence -> the ref of its text part in the translations, e.g. "43a.1."
+        self.persian_refs = {}
+        for row in load_rows(table_path):
+            key, ref = row["Title3"].split("|")[-2:]
+            self.persian_refs[key.strip(".")] = ref.split("Cr.")[1].strip(". ") + "."
+
+        # (sentence, word id) -> Greek token URN
+        treebank = load_rows(treebank_path)
+        self.greek_urns = {}
+        with open(ref_map_path) as f:
+            for line in f:
+                ref, idx, line_num = line.split()
+                word_ref = treebank[int(line_num)]["word - ref"]
+                _, _, sentence_id, word_id = word_ref.split("|")
+                # the first token a word is mapped to
+                self.greek_urns.setdefault(
+                    (sentence_id, word_id), f"{GREEK_VERSION}{ref}t{idx}"
+                )
+
+    def greek_urn(self, sentence_id: str, word_id: str):
+        return self.greek_urns.get((sentence_id, word_id))
+
+    def persian_urn(self, sentence_id: str, token_number: int):
+        return f"{PERSIAN_VERSION}{self.persian_refs[sentence_id]}t{token_number}"
+
+
+@dataclass
+class Sentence:
+    sentence_id: str
+    line_num: int
+    # (line number, line): the sentence, its numbered tokens, then its words
+    lines: list[tuple] = field(default_factory=list)
+    tokens: list[str] = field(default_factory=list)
+    # (treebank word id, line number, translation as written, Persian token numbers)
+    words: list[tuple] = field(default_factory=list)
+
+
+@dataclass
+class Report:
+    """
+    What did not check out, as (line number, message): errors leave a word out of
+    the alignment, warnings are about words aligned anyway.
+    """
+
+    errors: list = field(default_factory=list)
+    warnings: list = field(default_factory=list)
+
+
+def iter_sentences(lines):
+    """
+    Each "# n" sentence, its numbered Persian tokens and its word lines. A line
+    after the tokens that is not indented continues the word line before it.
+    """
+    sentence = None
+    for line_num, line in enumerate(lines, 1):
+        line = line.rstrip("\n")
+        if line.startswith("#"):
+            if sentence is not None:
+                yield sentence
+            sentence = Sentence(line.split()[1], line_num)
+        elif sentence is None or not line.strip():
+            continue
+        elif line.startswith("\t") or len(sentence.lines) < 2:
+            sentence.lines.append((line_num, line))
+        else:
+            previous_num, previous = sentence.lines[-1]
+            sentence.lines[-1] = (previous_num, previous + line)
+    if sentence is not None:
+        yield sentence
+
+
+def squeeze(text: str) -> str:
+    """`text` without spaces and zero width non-joiners, which corrections vary"""
+    return "".join(text.split()).replace(ZWNJ, "")
+
+
+def parse_sentence(sentence: Sentence, report: Report) -> Sentence:
+    if len(sentence.lines) >= 2:
+        sentence.tokens = [
+            token for token, _ in NUMBERED_TOKEN.findall(sentence.lines[1][1])
+        ]
+    for line_num, line in sentence.lines[2:]:
+        word_id, rest = line.strip().split(maxsplit=1)
+        translation = " ".join(TOKEN_NUMBER.sub(" ", rest).split())
+        numbers = sorted({int(n) for n in TOKEN_NUMBER.findall(rest)})
+        if not numbers:
+            report.errors.append((line_num, f"no Persian tokens for word {word_id}"))
+            continue
+        out_of_range = [n for n in numbers if not 1 <= n <= len(sentence.tokens)]
+        if out_of_range:
+            report.errors.append(
+                (
+                    line_num,
+                    f"sentence {sentence.sentence_id} has no token {out_of_range}",
+                )
+            )
+            continue
+        tokens = " ".join(sentence.tokens[n - 1] for n in numbers)
+        if squeeze(translation) != squeeze(tokens):
+            report.warnings.append(
+                (line_num, f"word {word_id}: {translation} numbered as {tokens}")
+            )
+        sentence.words.append((word_id, line_num, translation, tuple(numbers)))
+    return sentence
+
+
+def iter_records(sentences, index: TokenUrnIndex, report: Report, urn=ALIGNMENT_URN):
+    """
+    An alignment record for the treebank words of a sentence that are translated by
+    the same Persian tokens, for each sentence.
+    """
+    record_urn = urn.replace(":alignment.v1:", ":alignment-record.v1:")
+    idx = 0
+    for sentence in sentences:
+        sentence = parse_sentence(sentence, report)
+        if sentence.words and sentence.sentence_id not in index.persian_refs:
+            report.errors.append(
+                (sentence.line_num, f"unknown sentence {sentence.sentence_id}")
+            )
+            continue
+        groups = {}
+        for word_id, line_num, _, numbers in sentence.words:
+            greek_urn = index.greek_urn(sentence.sentence_id, word_id)
+            if greek_urn is None:
+                message = f"no Greek token for word {word_id} of {sentence.sentence_id}"
+                report.errors.append((line_num, message))
+                continue
+            greek = groups.setdefault(numbers, [])
+            if greek_urn not in greek:
+                greek.append(greek_urn)
+        for numbers, greek in groups.items():
+            persian = [index.persian_urn(sentence.sentence_id, n) for n in numbers]
+            yield {"urn": f"{record_urn}_{idx}", "relations": [greek, persian]}
+            idx += 1
+
+
+def build_alignment(numbering_path=NUMBERING_PATH, index=None, report=None) -> dict:
+    if index is None:
+        index = TokenUrnIndex()
+    if report is None:
+        report = Report()
+    with open(numbering_path) as f:
+        records = list(iter_records(iter_sentences(f), index, report))
+    return {
+        "urn": ALIGNMENT_URN,
+        "label": ALIGNMENT_LABEL,
+        "format": "atlas-standoff-annotation",
+        "enable_prototype": True,
+        "versions": [GREEK_VERSION, PERSIAN_VERSION],
+        "records": records,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("output", help="path of the alignment JSON to write")
+    parser.add_argument("--numbering", default=NUMBERING_PATH)
+    args = parser.parse_args()
+
+    report = Report()
+    data = build_alignment(args.numbering, report=report)
+    with open(args.output, "w") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+    for label, problems in (("error", report.errors), ("warning", report.warnings)):
+        for line_num, message in problems:
+            print(f"{args.numbering}:{line_num}: {label}: {message}", file=sys.stderr)
+    print(f"{len(data['records'])} records written to {args.output}")
+    sys.exit(1 if report.errors else 0)
+
+
+if __name__ == "__main__":
+    main()
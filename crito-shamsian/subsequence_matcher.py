@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+"""
+Finds the tokens of a translated phrase, in order, among the tokens of a sentence.
+
+Positions are 1-based, as in the {n} token numbers of the alignment output. The
+first occurrence of each phrase token at or after the previous match is taken, so a
+repeated phrase token can match the same sentence token again.
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+
+
+class TokenIndex:
+    """
+    The sorted positions of each token of a sentence, built once per sentence so
+    that each phrase token is found by bisection rather than a scan.
+    """
+
+    def __init__(self, tokens):
+        self.positions = defaultdict(list)
+        for position, token in enumerate(tokens, 1):
+            self.positions[token].append(position)
+
+    def next_position(self, token, start, tokens_to_ignore=()):
+        """The first position of `token` at or after `start` not in `tokens_to_ignore`."""
+        positions = self.positions.get(token)
+        if not positions:
+            return None
+        for i in range(bisect_left(positions, start), len(positions)):
+            if positions[i] not in tokens_to_ignore:
+                return positions[i]
+        return None
+
+    def skip_substring(self, B, tokens_to_ignore=None):
+        """
+        The positions of the tokens of `B` in order, skipping over other tokens and
+        the positions in `tokens_to_ignore`, or None if they are not all found.
+        """
+        if tokens_to_ignore is None:
+            tokens_to_ignore = ()
+        matches = []
+        start = 1
+        for token in B:
+            start = self.next_position(token, start, tokens_to_ignore)
+            if start is None:
+                return None
+            matches.append(start)
+        return matches
+
+
+def skip_substring(A, B, tokens_to_ignore=None):
+    return TokenIndex(A).skip_substring(B, tokens_to_ignore)
@@ -0,0 +1,39 @@
+from pathlib import Path
+
+from aligner import TRANSLATION_COLUMNS, Aligner
+
+HERE = Path(__file__).parent
+
+
+def make_aligner():
+    return Aligner(
+        HERE / "wegner-corrected-finalized-versions.csv",
+        HERE / "wegner-corrected-treebank.csv",
+    )
+
+
+def test_align_column():
+    aligner = make_aligner()
+    records = aligner.align_column("Primary translation")
+    assert len(records) == len(aligner.treebank)
+    x = [
+        (r.word_id, r.persian_tokens, r.matches)
+        for r in records[:6]
+        if r.persian_tokens
+    ]
+    assert x == [
+        ("1", ["برای", "چه"], [2, 3]),
+        ("2", ["بدین", "زودی"], [4, 5]),
+        ("3", ["آمده‌ای"], [6]),
+        ("5", ["ای"], [7]),
+        ("6", ["کریتون"], [8]),
+    ], x
+    assert not aligner.mismatches, aligner.mismatches
+
+
+def test_align_in_parallel():
+    aligner = make_aligner()
+    x = aligner.align(TRANSLATION_COLUMNS)
+    assert list(x) == TRANSLATION_COLUMNS
+    for column in TRANSLATION_COLUMNS:
+        assert x[column] == aligner.align_column(column), column
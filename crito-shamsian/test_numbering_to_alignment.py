@@ -0,0 +1,38 @@
+import io
+from pathlib import Path
+
+from numbering_to_alignment import Report, TokenUrnIndex, iter_records, iter_sentences
+
+HERE = Path(__file__).parent
+
+NUMBERING = """# 1
+سقراط: برای چه بدین زودی آمده‌ای، ای کریتون؟
+سقراط{1}  برای{2}  چه{3}  بدین{4}  زودی{5}  آمده‌ای{6}  ای{7}  کریتون{8}
+\t1 برای چه {2} {3}
+\t2 بدین زودی {4
+} {5}
+\t3 آمده‌ای {6}
+\t5 ای {9}
+\t6 ای {8}
+"""
+
+
+def test_iter_records():
+    index = TokenUrnIndex(
+        HERE / "wegner-corrected-finalized-versions.csv",
+        HERE / "wegner-corrected-treebank.csv",
+        HERE / "map1.tsv",
+    )
+    report = Report()
+    x = list(iter_records(iter_sentences(io.StringIO(NUMBERING)), index, report))
+    grc = "urn:cts:greekLit:tlg0059.tlg003.perseus-grc2b1:43a.1."
+    far = "urn:cts:greekLit:tlg0059.tlg003.perseus-far1:43a.1."
+    assert [record["relations"] for record in x] == [
+        [[f"{grc}t2"], [f"{far}t2", f"{far}t3"]],
+        [[f"{grc}t3"], [f"{far}t4", f"{far}t5"]],
+        [[f"{grc}t4"], [f"{far}t6"]],
+        [[f"{grc}t6"], [f"{far}t8"]],
+    ], x
+    assert x[0]["urn"].endswith(":alignment-record.v1:crito-shamsian-word-alignment_0")
+    assert report.errors == [(8, "sentence 1 has no token [9]")], report.errors
+    assert report.warnings == [(9, "word 6: ای numbered as کریتون")], report.warnings
@@ -0,0 +1,42 @@
+import random
+
+from subsequence_matcher import TokenIndex, skip_substring
+
+
+def scanning_skip_substring(A, B, tokens_to_ignore=None):
+    # the nested scan skip_substring replaces
+    if tokens_to_ignore is None:
+        tokens_to_ignore = set()
+    matches = []
+    for i in range(1, len(B) + 1):
+        start = matches[-1] if matches else 1
+        for j in range(start, len(A) + 1):
+            if j not in tokens_to_ignore and A[j - 1] == B[i - 1]:
+                matches.append(j)
+                break
+        else:
+            return None
+    return matches
+
+
+def test_skip_substring():
+    A = ["A", "B", "C", "D", "E", "F", "G", "H", "I", "J"]
+    assert skip_substring(A, ["C", "D", "G", "H"]) == [3, 4, 7, 8]
+    assert skip_substring(A, ["C", "D", "H", "G"]) is None
+    # a repeated token may match the same position again
+    x = skip_substring(["a", "b", "a"], ["b", "b", "a"])
+    assert x == [2, 2, 3], x
+    x = skip_substring(["a", "b", "a", "b"], ["b", "a"], {2})
+    assert x is None, x
+
+
+def test_skip_substring_matches_scan():
+    rng = random.Random(0)
+    for _ in range(2000):
+        A = rng.choices("abcde", k=rng.randint(0, 12))
+        B = rng.choices("abcdef", k=rng.randint(1, 4))
+        ignore = set(rng.sample(range(1, 13), rng.randint(0, 4)))
+        index = TokenIndex(A)
+        for tokens_to_ignore in (ignore, None):
+            x = index.skip_substring(B, tokens_to_ignore)
+            assert x == scanning_skip_substring(A, B, tokens_to_ignore), (A, B, x)
@@ -0,0 +1,66 @@
+import random
+from pathlib import Path
+
+from aligner import Aligner
+from textpart_index import (
+    EXACT,
+    NORMALIZED,
+    PREFIX,
+    SUBSTRING,
+    TextPartTokenIndex,
+    normalize,
+)
+
+HERE = Path(__file__).parent
+
+
+def scanning_find(text_content, needle):
+    # the scans word_alignment.py used to make for every treebank row
+    tokenish = text_content.split()
+    if needle in tokenish:
+        return tokenish.index(needle)
+    for pos, token in enumerate(tokenish):
+        if token.startswith(needle):
+            return pos
+    for pos, token in enumerate(tokenish):
+        if token.count(needle):
+            return pos
+    return None
+
+
+def test_find():
+    index = TextPartTokenIndex("ἔγωγε. τί δὲ ἐγώ· δ’ ἐγὼ")
+    assert index.find("ἐγώ·") == (3, EXACT)
+    assert index.find("ἐγ") == (3, PREFIX)
+    assert index.find("γωγ") == (0, SUBSTRING)
+    assert index.find("δ᾽") == (4, NORMALIZED)
+    assert index.find("σύ") == (None, None)
+    assert TextPartTokenIndex("").find("τί") == (None, None)
+    assert normalize("Ἐγὼ·") == "εγω"
+
+
+def test_find_matches_scan():
+    aligner = Aligner(
+        HERE / "wegner-corrected-finalized-versions.csv",
+        HERE / "wegner-corrected-treebank.csv",
+    )
+    indexes = {}
+    for _, sentence_id, _, greek_word in aligner.words:
+        text_content = aligner.greek_sentences[sentence_id]
+        if sentence_id not in indexes:
+            indexes[sentence_id] = TextPartTokenIndex(text_content)
+        position, match_type = indexes[sentence_id].find(greek_word)
+        if match_type != NORMALIZED:
+            x = scanning_find(text_content, greek_word)
+            assert position == x, (sentence_id, greek_word, position, x)
+
+    rng = random.Random(0)
+    for _ in range(2000):
+        text_content = " ".join(
+            "".join(rng.choices("abc", k=rng.randint(1, 4)))
+            for _ in range(rng.randint(0, 8))
+        )
+        index = TextPartTokenIndex(text_content)
+        needle = "".join(rng.choices("abc", k=rng.randint(1, 3)))
+        position, _ = index.find(needle)
+        assert position == scanning_find(text_content, needle), (text_content, needle)
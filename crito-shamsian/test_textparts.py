@@ -0,0 +1,29 @@
+from pathlib import Path
+
+import pytest
+
+from textparts import CRITO_VERSION, FileTextParts, get_textparts, version_path
+
+HERE = Path(__file__).parent
+
+
+def test_version_path():
+    x = version_path(CRITO_VERSION, "library")
+    assert x == Path("library/tlg0059/tlg003/tlg0059.tlg003.perseus-grc2b1.txt"), x
+
+
+def test_file_textparts():
+    textparts = FileTextParts(library_paths=[HERE.parent / "test-data" / "texts"])
+    assert len(textparts) == 267
+    first = list(textparts)[0]
+    assert first.urn == f"{CRITO_VERSION}43a.1", first
+    assert first.ref == "43a.1", first
+    assert first.text_content == "Σωκράτης. τί τηνικάδε ἀφῖξαι, ὦ Κρίτων;", first
+    assert textparts.get("54e.1").text_content.endswith("ταύτῃ ὁ θεὸς ὑφηγεῖται.")
+
+
+def test_missing_version():
+    with pytest.raises(FileNotFoundError):
+        FileTextParts("urn:cts:greekLit:tlg0059.tlg999.perseus-grc1:")
+    with pytest.raises(ValueError):
+        get_textparts("sheets")
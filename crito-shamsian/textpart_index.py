@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+"""
+Locates treebank word forms among the whitespace separated tokens of a text part.
+
+A form is matched, in order of preference, to the first token that is equal to it,
+that starts with it, that contains it, or that is equal to it once both are
+normalized (see `normalize`). The first three are what word_alignment.py used to
+scan each text part for; the last one only finds forms none of them did.
+
+    ./textpart_index.py
+
+reports how often each kind of match is needed to place the forms of
+wegner-corrected-treebank.csv in the Greek sentences of the finalized versions.
+"""
+
+import unicodedata
+from collections import Counter
+from typing import Optional
+
+EXACT = "exact"
+PREFIX = "prefix"
+SUBSTRING = "substring"
+NORMALIZED = "normalized"
+MATCH_TYPES = [EXACT, PREFIX, SUBSTRING, NORMALIZED]
+
+# elision marks used interchangeably by the texts and the treebanks
+ELISION_MARKS = "᾽’ʼ'"
+
+
+def normalize(token: str) -> str:
+    """`token` casefolded, without diacritics, punctuation or elision marks"""
+    decomposed = unicodedata.normalize("NFD", token).casefold()
+    return "".join(
+        char
+        for char in decomposed
+        if char not in ELISION_MARKS
+        and not unicodedata.combining(char)
+        and unicodedata.category(char)[0] != "P"
+    )
+
+
+class TextPartTokenIndex:
+    """
+    The tokens of a text part (0-based positions, as from str.split), indexed once:
+    a map from each token to its first position, a trie of the tokens holding the
+    first position of a token under each prefix, and a map from each normalized
+    token to its first position.
+    """
+
+    def __init__(self, text_content: str):
+        self.tokens = text_content.split()
+        self.positions = {}
+        self.normalized_positions = {}
+        # each node is [first position of a token with this prefix, {char: node}]
+        self.trie = [None, {}]
+        for position, token in enumerate(self.tokens):
+            self.positions.setdefault(token, position)
+            self.normalized_positions.setdefault(normalize(token), position)
+            node = self.trie
+            for char in token:
+                if node[0] is None:
+                    node[0] = position
+                node = node[1].setdefault(char, [None, {}])
+            if node[0] is None:
+                node[0] = position
+
+    def first_with_prefix(self, prefix: str) -> Optional[int]:
+        node = self.trie
+        for char in prefix:
+            node = node[1].get(char)
+            if node is None:
+                return None
+        return node[0]
+
+    def find(self, needle: str) -> tuple[Optional[int], Optional[str]]:
+        """The position of `needle` and the kind of match, or (None, None)."""
+        position = self.positions.get(needle)
+        if position is not None:
+            return position, EXACT
+        position = self.first_with_prefix(needle)
+        if position is not None:
+            return position, PREFIX
+        for position, token in enumerate(self.tokens):
+            if needle in token:
+                return position, SUBSTRING
+        position = self.normalized_positions.get(normalize(needle))
+        if position is not None:
+            return position, NORMALIZED
+        return None, None
+
+
+def report(match_types: Counter) -> str:
+    total = sum(match_types.values())
+    lines = []
+    for match_type in [*MATCH_TYPES, None]:
+        count = match_types[match_type]
+        share = count / total if total else 0
+        lines.append(f"{match_type or 'not found':>10}: {count:6} ({share:.1%})")
+    return "\n".join(lines)
+
+
+def main():
+    from aligner import Aligner
+
+    aligner = Aligner()
+    indexes = {}
+    match_types = Counter()
+    for _, sentence_id, _, greek_word in aligner.words:
+        if greek_word == "[0]":
+            continue
+        if sentence_id not in indexes:
+            indexes[sentence_id] = TextPartTokenIndex(
+                aligner.greek_sentences[sentence_id]
+            )
+        _, match_type = indexes[sentence_id].find(greek_word)
+        match_types[match_type] += 1
+    print(report(match_types))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+The text parts of a version, from the flat text files ATLAS ingests or from the
+`Node`s of an ATLAS database.
+
+A text file is `<textgroup>/<work>/<textgroup>.<work>.<version>.txt` under a library
+directory, with a line for each text part: its reference, ending with ".", and its
+text, e.g.
+
+    43a.1. Σωκράτης. τί τηνικάδε ἀφῖξαι, ὦ Κρίτων;
+
+`FileTextParts` reads the file of a version from the first of `LIBRARY_PATHS` that
+has it, without Django or a database; `DatabaseTextParts` queries the text parts at
+a depth of the version's tree, as word_alignment.py did.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+
+HERE = Path(__file__).parent
+
+LIBRARY_PATHS = [
+    HERE.parent.parent / "library",
+    HERE.parent / "test-data" / "texts",
+]
+
+CRITO_VERSION = "urn:cts:greekLit:tlg0059.tlg003.perseus-grc2b1:"
+
+
+@dataclass(frozen=True)
+class TextPart:
+    """The attributes of a text part `Node` the alignment scripts use."""
+
+    urn: str
+    ref: str
+    text_content: str
+
+
+def version_path(version_urn: str, library_path) -> Path:
+    """Where the text file of `version_urn` is in `library_path`."""
+    work_part = version_urn.rstrip(":").rsplit(":", maxsplit=1)[1]
+    textgroup, work, _ = work_part.split(".")
+    return Path(library_path) / textgroup / work / f"{work_part}.txt"
+
+
+def read_textparts(version_urn: str, path) -> list[TextPart]:
+    textparts = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            ref, _, text = line.strip().partition(" ")
+            ref = ref.rstrip(".")
+            textparts.append(TextPart(f"{version_urn}{ref}", ref, text.strip()))
+    return textparts
+
+
+class FileTextParts:
+    """The text parts of a version, read from its text file."""
+
+    def __init__(self, version_urn=CRITO_VERSION, library_paths=LIBRARY_PATHS):
+        for library_path in library_paths:
+            path = version_path(version_urn, library_path)
+            if path.exists():
+                break
+        else:
+            raise FileNotFoundError(
+                f"no text file for {version_urn} in {[str(p) for p in library_paths]}"
+            )
+        self.path = path
+        self.textparts = read_textparts(version_urn, path)
+        self.by_ref = {textpart.ref: textpart for textpart in self.textparts}
+
+    def __iter__(self):
+        return iter(self.textparts)
+
+    def __len__(self):
+        return len(self.textparts)
+
+    def get(self, ref: str) -> TextPart:
+        return self.by_ref[ref]
+
+
+class DatabaseTextParts:
+    """
+    The text parts at `depth` of a version in the ATLAS database; needs a
+    configured scaife_viewer Django project.
+    """
+
+    def __init__(self, version_urn=CRITO_VERSION, depth=7):
+        from scaife_viewer.atlas.models import Node
+
+        version = Node.objects.get(urn=version_urn)
+        self.textparts = list(version.get_descendants().filter(depth=depth))
+        self.by_ref = {textpart.ref: textpart for textpart in self.textparts}
+
+    def __iter__(self):
+        return iter(self.textparts)
+
+    def __len__(self):
+        return len(self.textparts)
+
+    def get(self, ref: str):
+        return self.by_ref[ref]
+
+
+PROVIDERS = {
+    "files": FileTextParts,
+    "db": DatabaseTextParts,
+}
+
+
+def get_textparts(source="files", version_urn=CRITO_VERSION):
+    """The text parts of `version_urn`, from "files" or the "db"."""
+    try:
+        provider = PROVIDERS[source]
+    except KeyError:
+        raise ValueError(f"unknown text part source {source!r}") from None
+    return provider(version_urn)
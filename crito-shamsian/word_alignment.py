@@ -1,15 +1,27 @@
 # NOTE: This is a work in progress script; needs further refactoring to be promoted to an "extractor"
+import argparse
 import csv
-from collections import defaultdict
+from collections import Counter, defaultdict
 from pathlib import Path
 
 from lxml import etree
 
-from scaife_viewer.atlas.models import Node
+from textpart_index import TextPartTokenIndex, report
+from textparts import CRITO_VERSION, PROVIDERS, get_textparts
 
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "--textparts",
+    choices=PROVIDERS,
+    default="files",
+    help="read the Greek text parts from the library text files or the ATLAS database",
+)
+parser.add_argument("--data-dir", default="data/raw/crito-shamsian")
+args = parser.parse_args()
+data_dir = Path(args.data_dir)
 
 # a CSV version of the treebank from Google Sheets
-input_path = Path("data/raw/crito-shamsian/wegner-corrected-treebank.csv")
+input_path = data_dir / "wegner-corrected-treebank.csv"
 
 
 with input_path.open(encoding="utf-8-sig") as f:
@@ -22,8 +34,7 @@ word_parts = defaultdict(list)
 # The treebank does not have the speaker identification information;
 # we would need some kind of heuristic to strip it out.
 # This mapping goes from 1-based line offsets to CTS references
-version = Node.objects.get(urn="urn:cts:greekLit:tlg0059.tlg003.perseus-grc2b1:")
-textparts = version.get_descendants().filter(depth=7)
+textparts = get_textparts(args.textparts, CRITO_VERSION)
 ref_lookup = {}
 textpart_lookup = {}
 for idx, t in enumerate(textparts):
@@ -51,7 +62,7 @@ for row in rows:
 # next functions are working towards word-level alignment and mapping Farnoosh's annotations to the glaux treebanks
 skipped_forms = set(["[0]", "[1]", "[2]", "[3]", "[4]"])
 # https://github.com/perseids-publications/pedalion-trees/blob/master/public/xml/crit.xml
-old_treebank_path = Path("data/raw/crito-shamsian/crit.xml")
+old_treebank_path = data_dir / "crit.xml"
 parsed = etree.parse(old_treebank_path.open())
 old_sentence_counts = defaultdict(int)
 for sentence in parsed.xpath("//sentence"):
@@ -63,7 +74,7 @@ for sentence in parsed.xpath("//sentence"):
         old_sentence_counts[key] += 1
 
 # from https://github.com/gregorycrane/glaux-trees/blob/master/public/xml/0059-003.xml
-new_treebank_path = Path("data/raw/crito-shamsian/0059-003.xml")
+new_treebank_path = data_dir / "0059-003.xml"
 parsed = etree.parse(new_treebank_path.open())
 new_sentence_counts = defaultdict(int)
 for sentence in parsed.xpath("//sentence"):
@@ -84,6 +95,9 @@ for old, new in zip(old_sentence_counts.items(), new_sentence_counts.items()):
         print(old, new)
 
 # Try to map spreadsheet cells to tokens
+# each text part's tokens are indexed once, by sentence id
+textpart_indexes = {}
+match_types = Counter()
 sentences = defaultdict(list)
 ref_to_sentence_id_lookup = {}
 for row_pos, row in enumerate(rows):
@@ -96,28 +110,16 @@ for row_pos, row in enumerate(rows):
     ref_to_sentence_id_lookup[ref] = sentence_id
     sentences[ref].append(row["word - form"])
     ve_ref = f"{sentence_id}.t{word_id}"
-    text_part = textpart_lookup[sentence_id]
-    tokenish = text_part.text_content.split()
+    if sentence_id not in textpart_indexes:
+        text_part = textpart_lookup[sentence_id]
+        textpart_indexes[sentence_id] = TextPartTokenIndex(text_part.text_content)
     needle = row["word - form"]
     if needle in set(["[0]"]):
         continue
-    index_val = None
-    try:
-        index_val = tokenish.index(needle)
-    except ValueError:
-        for pos, token in enumerate(tokenish):
-            if token.startswith(needle):
-                index_val = pos
-                break
-    try:
-        assert index_val is not None
-    except AssertionError:
-        for pos, token in enumerate(tokenish):
-            if token.count(needle):
-                index_val = pos
-                break
-    try:
-        assert index_val is not None
-    except AssertionError:
+    index_val, match_type = textpart_indexes[sentence_id].find(needle)
+    match_types[match_type] += 1
+    if index_val is None:
         print(f"Could not find index_val [row_pos={row_pos}]")
         continue
+
+print(report(match_types))
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+
+"""
+Times the serializers backends against the json.dumps call the converters used to
+make per entry, over the converted LSJ and Middle Liddell entries, and checks that
+every backend writes the same bytes. Run from this directory:
+    python bench_serializers.py [entries_*.jsonl ...]
+"""
+
+import json
+import sys
+import timeit
+from pathlib import Path
+
+from serializers import BACKENDS, get_serializer
+
+DICTIONARIES_DIR = Path("../../test-data/dictionaries")
+
+
+def json_dumps(entry):
+    return (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def load_entries(paths):
+    entries = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            entries.extend(json.loads(line) for line in f)
+    return entries
+
+
+def main():
+    paths = [Path(p) for p in sys.argv[1:]] or [
+        *sorted(DICTIONARIES_DIR.glob("lsj/entries_*.jsonl")),
+        *sorted(DICTIONARIES_DIR.glob("middle-liddell/entries_*.jsonl")),
+    ]
+    entries = load_entries(paths)
+    expected = [json_dumps(entry) for entry in entries]
+    print(f"{len(entries)} entries, {sum(map(len, expected)) >> 20} MiB")
+
+    candidates = [("json.dumps", json_dumps)]
+    for name in BACKENDS:
+        try:
+            dumps = get_serializer(name)
+        except ImportError:
+            print(f"{name:>10}: not installed")
+            continue
+        candidates.append((name, lambda entry, dumps=dumps: dumps(entry) + b"\n"))
+
+    for name, fn in candidates:
+        differ = sum(fn(entry) != line for entry, line in zip(entries, expected))
+        assert not differ, f"{name}: {differ} entries serialized differently"
+        seconds = timeit.timeit(lambda: [fn(entry) for entry in entries], number=1)
+        print(f"{name:>10}: {seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+
+"""
+Compares markup.strip_tags with the tag-by-tag removal that to_string used to do.
+
+The dictionary XML sources live outside this repo, so the XML is rebuilt from the
+converted entries: each definition (which keeps its <i> and Cunliffe's <corr> tags)
+becomes a <sense>, with its citation refs wrapped in <bibl n="..."> elements again.
+Run from this directory:
+    python bench_to_string.py [entries_*.jsonl ...]
+"""
+
+import json
+import re
+import sys
+import timeit
+from pathlib import Path
+from xml.sax.saxutils import quoteattr
+
+from lxml import etree
+
+from markup import serialize, strip_tags
+
+DICTIONARIES_DIR = Path("../../test-data/dictionaries")
+
+
+def old_lsj_to_string(el, method="xml"):
+    text = etree.tostring(el, with_tail=True, encoding="utf-8", method=method).decode(
+        "utf-8"
+    )
+    pattern = re.compile("<.+?>")
+    for match in re.findall(pattern, text):
+        if match != "<i>" and match != "</i>":
+            text = re.sub(re.escape(match), "", text)
+    return text
+
+
+def old_cunliffe_to_string(el, method="xml"):
+    text = (
+        etree.tostring(el, with_tail=True, encoding="utf-8", method=method)
+        .decode("utf-8")
+        .strip()
+    )
+    pattern = re.compile("<.+?>")
+    for matched in re.findall(pattern, text):
+        if matched != "<i>" and matched != "</i>":
+            if not re.match(r"<.*?corr.*?>", matched):
+                text = text.replace(matched, "")
+    return text
+
+
+def lsj_to_string(el, method="xml"):
+    return strip_tags(serialize(el, method=method))
+
+
+def cunliffe_to_string(el, method="xml"):
+    return strip_tags(serialize(el, method=method).strip(), keep_corr=True)
+
+
+def iter_definitions(entry):
+    yield entry.get("definition", ""), entry.get("citations", [])
+    senses = list(entry.get("senses", []))
+    while senses:
+        sense = senses.pop()
+        yield sense["definition"], sense.get("citations", [])
+        senses.extend(sense["children"])
+
+
+def rebuild_sense(definition, citations):
+    for citation in citations:
+        ref = citation["data"].get("ref")
+        if ref and ref in definition:
+            bibl = f"<bibl n={quoteattr(citation['data']['urn'])}>{ref}</bibl>"
+            definition = definition.replace(ref, bibl, 1)
+    try:
+        return etree.fromstring(f"<sense>{definition}</sense>")
+    except etree.XMLSyntaxError:
+        return None
+
+
+def load_senses(paths):
+    senses = []
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                for definition, citations in iter_definitions(json.loads(line)):
+                    sense = rebuild_sense(definition, citations)
+                    if sense is not None:
+                        senses.append(sense)
+    return senses
+
+
+def main():
+    paths = [Path(p) for p in sys.argv[1:]] or sorted(
+        DICTIONARIES_DIR.glob("*/entries_*.jsonl")
+    )
+    senses = load_senses(paths)
+    # to_string is called on each child of a sense
+    children = [child for sense in senses for child in sense]
+    print(f"{len(senses)} senses, {len(children)} child elements")
+
+    for label, old, new in (
+        ("lsj", old_lsj_to_string, lsj_to_string),
+        ("cunliffe", old_cunliffe_to_string, cunliffe_to_string),
+    ):
+        for elements in (children, senses):
+            differ = sum(old(el) != new(el) for el in elements)
+            assert not differ, f"{label}: {differ} elements rendered differently"
+        for name, fn in (("old", old), ("new", new)):
+            seconds = timeit.timeit(lambda: [fn(el) for el in senses], number=1)
+            print(f"{label:>8} {name}: {seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+
+"""
+Rewrites the Perseus ids in the "n" attribute of dictionary <bibl> elements as CTS URNs,
+shared by the LSJ and Cunliffe conversion scripts.
+"""
+
+import functools
+import re
+
+BOOK_LINE = re.compile(r"(,\d+:\d+)(:*)(\d*)")
+AUTHOR_WORK = re.compile(r"(.+)(,)(.+)(,)(.+)")
+WORK_PASSAGE = re.compile(r"(.+)(\.)(.+)(:)(.+)")
+
+
+# the same loci are cited over and over, so rewritten ids are memoized
+@functools.lru_cache(maxsize=1 << 18)
+def process_citation_urn(urn: str) -> str:
+    # these four lines deal with citation urns that have book and line number
+    book_line = BOOK_LINE.search(urn)
+    if book_line and book_line.group(3):
+        urn = BOOK_LINE.sub(r"\1.\3", urn)
+    urn = urn.replace("Perseus:abo", "urn:cts:greekLit")
+
+    # we want to replace the first "," with "" and the second "," with "."
+    # we also want to insert tlg after tlg#.
+    urn = AUTHOR_WORK.sub(r"\1\3.tlg\5", urn)
+
+    # go from urn:cts:greekLit:tlg0012.tlg001:8.409
+    # to urn:cts:greekLit:tlg0012.tlg001.perseus-grc2:8.409
+    urn = WORK_PASSAGE.sub(r"\1\2\3.perseus-grc2\4\5", urn)
+
+    return urn
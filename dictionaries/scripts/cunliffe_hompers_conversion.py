@@ -5,11 +5,14 @@ Work-in-progress script to convert Helma Dik's XML of the cunliffe_hompers to JS
 """
 
 import re
-import json
 
 from pathlib import Path
 from lxml import etree
-import unicodedata
+
+from greek_keys import generate_key
+from jsonl_writer import ShardedWriter, make_metadata
+from markup import remove_elements, serialize, strip_tags
+from urn_registry import RecentUrns, check_urns
 
 CUNLIFFE_REPO = Path("../../../cunliffe-hompers")
 # CUNLIFFE_REPO_DEBUG = Path("../../../cunliffe_hompers/dik_version/test")
@@ -21,70 +24,13 @@ nsmap = {"ns": "http://www.tei-c.org/ns/1.0"}
 
 
 def to_string(el, method="xml", to_remove=[], with_tail=True):
-    text = (
-        etree.tostring(el, with_tail=with_tail, encoding="utf-8", method=method)
-        .decode("utf-8")
-        .strip()
-    )
+    text = serialize(el, method=method, with_tail=with_tail).strip()
     if method != "xml":
         return text
     # remove unwanted elements
-    for tag in to_remove:
-        pattern = re.compile(f"<{tag}.+?{tag}>")
-        text = re.sub(pattern, "", text)
-    # now remove all xml tags except for italicization
-    pattern = re.compile("<.+?>")
-    for matched in re.findall(pattern, text):
-        if matched != "<i>" and matched != "</i>":
-            if not re.match(r"<.*?corr.*?>", matched):
-                text = text.replace(matched, "")
-    return text
-
-
-def latinize(char):
-    mappings = {
-        "α": "a",
-        "β": "b",
-        "γ": "g",
-        "δ": "d",
-        "ε": "e",
-        "ζ": "z",
-        "η": "h",
-        "θ": "q",
-        "ι": "i",
-        "κ": "k",
-        "λ": "l",
-        "μ": "m",
-        "ν": "n",
-        "ξ": "c",
-        "ο": "o",
-        "π": "p",
-        "ρ": "r",
-        "σ": "s",
-        "ς": "s",
-        "ϲ": "s",
-        "τ": "t",
-        "υ": "u",
-        "φ": "f",
-        "χ": "x",
-        "ψ": "y",
-        "ω": "w",
-        chr(787): ")",  # smooth breathing
-        chr(788): "(",  # rough breathing
-        chr(769): "/",  # acute accent
-        chr(768): "\\",  # grave accent
-        chr(834): "=",  # circumflex accent
-        chr(837): "|",  # iota subscript
-    }
-    return mappings.get(char, "")
-
-
-def generate_key(greek_lemma):
-    key = []
-    for char in greek_lemma:
-        for element in unicodedata.normalize("NFD", char.lower()):
-            key.append(latinize(element))
-    return "".join(key)
+    text = remove_elements(text, to_remove)
+    # now remove all xml tags except for italicization and corrections
+    return strip_tags(text, keep_corr=True)
 
 
 def normalize_whitespace(text):
@@ -118,9 +64,9 @@ def process_citations(child, counter):
         elif re.search("Od", cit_string) and matched:
             book_line = matched[0]
             ref_urn = f"urn:cts:greekLit:tlg0012.tlg002.perseus-grc2:{book_line}"
-        assert ref_urn is not None, (
-            f"book and line number in wrong format for {child.attrib.get('n')}"
-        )
+        assert (
+            ref_urn is not None
+        ), f"book and line number in wrong format for {child.attrib.get('n')}"
         ref = normalize_whitespace(to_string(bibl))
         citations.append(
             {
@@ -165,65 +111,18 @@ def get_entries(root, counter: dict):
         }
 
 
-def check_urns(jsonl_filepath, urns={}):
-    with open(jsonl_filepath, "r") as f:
-        for i, line in enumerate(f):
-            new_urn = json.loads(line)["urn"]
-            if new_urn in set(urns.keys()):
-                raise ValueError(
-                    f"There is a duplicated URN in line {i} of file {jsonl_filepath}. \
-                    The same urn was read in at line {urns[new_urn][1]} of file {urns[new_urn][0]}."
-                )
-            urns[new_urn] = (jsonl_filepath, i)
-    return urns
-
-
-def make_metadata(label, kind, desto_path, urn=None):
-    if urn is None:
-        try:
-            urn = URN_PREFIX
-        except TypeError:
-            print("No URN provided, so no metafile has been generated.")
-            return None
-
-    entry_list = []
-    for filename in sorted(desto_path.glob("*.jsonl")):
-        entry_list.append(str(filename).split("/")[-1])
-
-    metadata = {"label": label, "urn": urn, "kind": kind, "entries": entry_list}
-
-    with open(f"{desto_path}/metadata.json", "w") as f:
-        json.dump(metadata, f)
-
-    print("metadata.json file written")
-
-
 if __name__ == "__main__":
-    urns = {}
     counter = {"entry_count": 0, "citation_count": 0}
-    # for filename in sorted(CUNLIFFE_REPO_DEBUG.glob("*.xml")):
-    for filename in sorted(CUNLIFFE_REPO.glob("*.xml")):
-        tree = etree.parse(filename)
-        root = tree.getroot()
-
-        num = 1
-        prev_ten_urns = []
+    with ShardedWriter(DESTO_DIR, name="entries_{:02d}.jsonl") as writer:
+        # for filename in sorted(CUNLIFFE_REPO_DEBUG.glob("*.xml")):
+        for filename in sorted(CUNLIFFE_REPO.glob("*.xml")):
+            tree = etree.parse(filename)
+            root = tree.getroot()
 
-        with open(f"{DESTO_DIR}/entries_{num:02d}.jsonl", "w") as f:
-            num += 1
+            recent_urns = RecentUrns()
             for entry in get_entries(root, counter):
-                if entry["urn"] in set(prev_ten_urns):
-                    for i, id in enumerate(prev_ten_urns):
-                        if entry["urn"] == id:
-                            entry["urn"] += f"_{i}"
-
-                if len(prev_ten_urns) == 10:
-                    del prev_ten_urns[0]
-                prev_ten_urns.append(entry["urn"])
-                f.write(json.dumps(entry, ensure_ascii=False))
-                f.write("\n")
-    # Note that this does not check for duplicates accross files
-
-    for filename in sorted(DESTO_DIR.glob("*.jsonl")):
-        urns = check_urns(filename, urns)
-    make_metadata("cunliffe_hompers", "Dictionary", DESTO_DIR)
+                entry["urn"] = recent_urns.disambiguate(entry["urn"])
+                writer.write(entry)
+
+    check_urns(writer.paths)
+    make_metadata("cunliffe_hompers", "Dictionary", DESTO_DIR, URN_PREFIX, writer.paths)
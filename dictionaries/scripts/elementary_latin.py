@@ -8,12 +8,15 @@ to retain formatting or citations.
 This will all come later (see LSJ).
 """
 
-import json
-
 from pathlib import Path
 from lxml import etree
 import unicodedata
 
+from jsonl_writer import ShardedWriter, make_metadata
+from sense_tree import SenseTree
+from urn_registry import check_urns
+from xml_entries import iter_entries
+
 ELEM_LATIN_REPO = Path("../../../elementary-latin")
 DESTO_DIR = Path("../../test-data/dictionaries/elementary-latin")
 
@@ -30,242 +33,21 @@ def to_string(el):
 
 
 def get_senses(entry, urn):
-    parent_senses = []
+    senses = SenseTree(urn)
     for sense in entry.xpath("sense"):
-        sense_orig_id = sense.attrib["id"]
         contents = to_string(sense).strip() if sense.text else ""
+        senses.add(
+            int(sense.attrib["level"]),
+            sense.attrib.get("n"),
+            contents,
+            sense_id=sense.attrib["id"],
+        )
+    return senses.senses
 
-        if sense.attrib["level"] == "0":
-            sense_urn = f"{urn}-{sense_orig_id}"
-            parent_senses.append(
-                {
-                    "label": sense.attrib.get("n"),
-                    "definition": contents,
-                    "urn": sense_urn,
-                    "children": [],
-                }
-            )
-
-        elif sense.attrib["level"] == "1":
-            if len(parent_senses) == 0:
-                parent_senses.append(
-                    {
-                        "definition": "",
-                        "urn": f"{urn}-0",
-                        "children": [],
-                    }
-                )
-            parent_urn = parent_senses[-1]["urn"]
-            sense_urn = f"{parent_urn}-{sense_orig_id}"
-            parent_senses[-1]["children"].append(
-                {
-                    "label": sense.attrib.get("n"),
-                    "definition": contents,
-                    "urn": sense_urn,
-                    "children": [],
-                }
-            )
-
-        elif sense.attrib["level"] == "2":
-            if len(parent_senses) == 0:
-                parent_senses.append(
-                    {
-                        "definition": "",
-                        "urn": f"{urn}-0",
-                        "children": [],
-                    }
-                )
-
-            if len(parent_senses[-1]["children"]) == 0:
-                parent_senses[-1]["children"].append(
-                    {
-                        "definition": "",
-                        "urn": f"{parent_senses[-1]['urn']}-0",
-                        "children": [],
-                    }
-                )
-
-            parent_urn = parent_senses[-1]["children"][-1]["urn"]
-            sense_urn = f"{parent_urn}-{sense_orig_id}"
-
-            parent_senses[-1]["children"][-1]["children"].append(
-                {
-                    "label": sense.attrib.get("n"),
-                    "definition": contents,
-                    "urn": sense_urn,
-                    "children": [],
-                }
-            )
-
-        elif sense.attrib["level"] == "3":
-            if len(parent_senses) == 0:
-                parent_senses.append(
-                    {
-                        "definition": "",
-                        "urn": f"{urn}-0",
-                        "children": [],
-                    }
-                )
-
-            if len(parent_senses[-1]["children"]) == 0:
-                parent_senses[-1]["children"].append(
-                    {
-                        "definition": "",
-                        "urn": f"{parent_senses[-1]['urn']}-0",
-                        "children": [],
-                    }
-                )
-
-            if len(parent_senses[-1]["children"][-1]["children"]) == 0:
-                parent_senses[-1]["children"][-1]["children"].append(
-                    {
-                        "definition": "",
-                        "urn": f"{parent_senses[-1]['children'][-1]['urn']}-0",
-                        "children": [],
-                    }
-                )
-
-            parent_urn = parent_senses[-1]["children"][-1]["children"][-1]["urn"]
-            sense_urn = f"{parent_urn}-{sense_orig_id}"
-            parent_senses[-1]["children"][-1]["children"][-1]["children"].append(
-                {
-                    "label": sense.attrib.get("n"),
-                    "definition": contents,
-                    "urn": sense_urn,
-                    "children": [],
-                }
-            )
-
-        elif sense.attrib["level"] == "4":
-            if len(parent_senses) == 0:
-                parent_senses.append(
-                    {
-                        "definition": "",
-                        "urn": f"{urn}-0",
-                        "children": [],
-                    }
-                )
-
-            if len(parent_senses[-1]["children"]) == 0:
-                parent_senses[-1]["children"].append(
-                    {
-                        "definition": "",
-                        "urn": f"{parent_senses[-1]['urn']}-0",
-                        "children": [],
-                    }
-                )
-
-            if len(parent_senses[-1]["children"][-1]["children"]) == 0:
-                parent_senses[-1]["children"][-1]["children"].append(
-                    {
-                        "definition": "",
-                        "urn": f"{parent_senses[-1]['children'][-1]['urn']}-0",
-                        "children": [],
-                    }
-                )
-
-            if len(parent_senses[-1]["children"][-1]["children"][-1]["children"]) == 0:
-                parent_senses[-1]["children"][-1]["children"][-1]["children"].append(
-                    {
-                        "definition": "",
-                        "urn": f"{parent_senses[-1]['children'][-1]['children'][-1]['urn']}-0",
-                        "children": [],
-                    }
-                )
-
-            parent_urn = parent_senses[-1]["children"][-1]["children"][-1]["children"][
-                -1
-            ]["urn"]
-            sense_urn = f"{parent_urn}-{sense_orig_id}"
-
-            parent_senses[-1]["children"][-1]["children"][-1]["children"][-1][
-                "children"
-            ].append(
-                {
-                    "label": sense.attrib.get("n"),
-                    "definition": contents,
-                    "urn": sense_urn,
-                    "children": [],
-                }
-            )
-
-        elif sense.attrib["level"] == "5":
-            if len(parent_senses) == 0:
-                parent_senses.append(
-                    {
-                        "definition": "",
-                        "urn": f"{urn}-0",
-                        "children": [],
-                    }
-                )
 
-            if len(parent_senses[-1]["children"]) == 0:
-                parent_senses[-1]["children"].append(
-                    {
-                        "definition": "",
-                        "urn": f"{parent_senses[-1]['urn']}-0",
-                        "children": [],
-                    }
-                )
-
-            if len(parent_senses[-1]["children"][-1]["children"]) == 0:
-                parent_senses[-1]["children"][-1]["children"].append(
-                    {
-                        "definition": "",
-                        "urn": f"{parent_senses[-1]['children'][-1]['urn']}-0",
-                        "children": [],
-                    }
-                )
-
-            if len(parent_senses[-1]["children"][-1]["children"][-1]["children"]) == 0:
-                parent_senses[-1]["children"][-1]["children"][-1]["children"].append(
-                    {
-                        "definition": "",
-                        "urn": f"{parent_senses[-1]['children'][-1]['children'][-1]['urn']}-0",
-                        "children": [],
-                    }
-                )
-
-            if (
-                len(
-                    parent_senses[-1]["children"][-1]["children"][-1]["children"][-1][
-                        "children"
-                    ]
-                )
-                == 0
-            ):
-                parent_senses[-1]["children"][-1]["children"][-1]["children"][-1][
-                    "children"
-                ].append(
-                    {
-                        "definition": "",
-                        "urn": f"{parent_senses[-1]['children'][-1]['children'][-1]['children'][-1]['urn']}-0",
-                        "children": [],
-                    }
-                )
-
-            parent_urn = parent_senses[-1]["children"][-1]["children"][-1]["children"][
-                -1
-            ]["children"][-1]["urn"]
-            sense_urn = f"{parent_urn}-{sense_orig_id}"
-
-            parent_senses[-1]["children"][-1]["children"][-1]["children"][-1][
-                "children"
-            ][-1]["children"].append(
-                {
-                    "label": sense.attrib.get("n"),
-                    "definition": contents,
-                    "urn": sense_urn,
-                    "children": [],
-                }
-            )
-
-    return parent_senses
-
-
-def get_entries(root):
+def get_entries(filename):
     # first div element has metadata, second div element has introduction
-    for entry in root.xpath("text//entry"):
+    for entry in iter_entries(filename, "entry"):
         entry_orig_id = entry.attrib["id"]
         entry_key = entry.attrib["key"]
 
@@ -294,49 +76,9 @@ def get_entries(root):
         }
 
 
-def check_urns(jsonl_filepath, urns={}):
-    with open(jsonl_filepath, "r") as f:
-        for i, line in enumerate(f):
-            new_urn = json.loads(line)["urn"]
-            if new_urn in set(urns.keys()):
-                raise ValueError(
-                    f"There is a duplicated URN in line {i} of file {jsonl_filepath}. \
-                    The same urn was read in at line {urns[new_urn][1]} of file {urns[new_urn][0]}."
-                )
-            urns[new_urn] = (jsonl_filepath, i)
-    return urns
-
-
-def make_metadata(label, kind, desto_path, urn=None):
-    if urn is None:
-        try:
-            urn = URN_PREFIX
-        except TypeError:
-            print("No URN provided, so no metafile has been generated.")
-            return None
-
-    entry_list = []
-    for filename in sorted(desto_path.glob("*.jsonl")):
-        entry_list.append(str(filename).split("/")[-1])
-
-    metadata = {"label": label, "urn": urn, "kind": kind, "entries": entry_list}
-
-    with open(f"{desto_path}/metadata.json", "w") as f:
-        json.dump(metadata, f)
-
-    print("metadata.json file written")
-
-
-urns = {}
-for filename in sorted(ELEM_LATIN_REPO.glob("*.xml")):
-    tree = etree.parse(filename)
-    root = tree.getroot()
-
-    with open(f"{DESTO_DIR}/entries_001.jsonl", "w") as f:
-        for entry in get_entries(root):
-            f.write(json.dumps(entry, ensure_ascii=False))
-            f.write("\n")
-
-    urns = check_urns(f"{DESTO_DIR}/entries_001.jsonl", urns)
+with ShardedWriter(DESTO_DIR) as writer:
+    for filename in sorted(ELEM_LATIN_REPO.glob("*.xml")):
+        writer.write_all(get_entries(filename))
 
-make_metadata("Elementary Latin", "Dictionary", DESTO_DIR)
+check_urns(writer.paths)
+make_metadata("Elementary Latin", "Dictionary", DESTO_DIR, URN_PREFIX, writer.paths)
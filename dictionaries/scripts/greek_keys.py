@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+
+"""
+Beta code style keys for Greek headwords ("ἀ-" -> "a)"), shared by the LSJ,
+Cunliffe and Anabasis conversion scripts.
+"""
+
+import functools
+import unicodedata
+from typing import Iterable, Optional
+
+MAPPINGS = {
+    "α": "a",
+    "β": "b",
+    "γ": "g",
+    "δ": "d",
+    "ε": "e",
+    "ζ": "z",
+    "η": "h",
+    "θ": "q",
+    "ι": "i",
+    "κ": "k",
+    "λ": "l",
+    "μ": "m",
+    "ν": "n",
+    "ξ": "c",
+    "ο": "o",
+    "π": "p",
+    "ρ": "r",
+    "σ": "s",
+    "ς": "s",
+    "ϲ": "s",
+    "τ": "t",
+    "υ": "u",
+    "φ": "f",
+    "χ": "x",
+    "ψ": "y",
+    "ω": "w",
+    chr(787): ")",  # smooth breathing
+    chr(788): "(",  # rough breathing
+    chr(769): "/",  # acute accent
+    chr(768): "\\",  # grave accent
+    chr(834): "=",  # circumflex accent
+    chr(837): "|",  # iota subscript
+}
+
+# separates lemmas in generate_keys; it has no key of its own
+SEPARATOR = "\n"
+
+
+def latinize(char: str) -> str:
+    return MAPPINGS.get(char, "")
+
+
+class KeyTable(dict):
+    """
+    str.translate table from a character to its key: the character is lowercased
+    and decomposed on its own, and its unmapped parts dropped. Doing this per
+    character rather than on the whole lemma keeps keys unchanged where NFD would
+    reorder combining marks across characters. Entries for the Greek blocks are
+    computed up front, others on first use.
+    """
+
+    def __init__(self, overrides: Optional[dict] = None):
+        super().__init__()
+        for codepoint in (*range(0x0370, 0x0400), *range(0x1F00, 0x2000)):
+            self.__missing__(codepoint)
+        self.update(overrides or {})
+
+    def __missing__(self, codepoint: int) -> str:
+        decomposed = unicodedata.normalize("NFD", chr(codepoint).lower())
+        key = "".join(latinize(element) for element in decomposed)
+        self[codepoint] = key
+        return key
+
+
+KEY_TABLE = KeyTable()
+BULK_KEY_TABLE = KeyTable({ord(SEPARATOR): SEPARATOR})
+
+
+@functools.lru_cache(maxsize=65536)
+def generate_key(greek_lemma: str) -> str:
+    return greek_lemma.translate(KEY_TABLE)
+
+
+def generate_keys(greek_lemmas: Iterable[str]) -> list[str]:
+    """keys for many lemmas at once, with a single str.translate call"""
+    lemmas = list(greek_lemmas)
+    if not lemmas:
+        return []
+    joined = SEPARATOR.join(lemmas)
+    if joined.count(SEPARATOR) != len(lemmas) - 1:
+        # a lemma contains the separator
+        return [generate_key(lemma) for lemma in lemmas]
+    return joined.translate(BULK_KEY_TABLE).split(SEPARATOR)
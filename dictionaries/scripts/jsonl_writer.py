@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+
+"""
+Writes converted dictionary entries as JSONL shards plus the metadata.json that lists
+them, shared by the dictionary conversion scripts.
+"""
+
+import contextlib
+import json
+import os
+from pathlib import Path
+from typing import Iterable, Optional
+
+from serializers import get_serializer
+
+BUFFER_SIZE = 1 << 20
+
+
+class ShardedWriter:
+    """
+    Writes entries, one JSON object per line, to `name` formatted with 1, 2, ... in
+    `dest_dir` (entries_001.jsonl, entries_002.jsonl, ... by default), starting a new
+    shard once the current one has `max_entries` entries or would grow past
+    `max_bytes` bytes. Without either limit everything goes to a single shard, so
+    `name` may then be a plain file name.
+
+    Each shard is written to a hidden temp file, which is renamed into place when the
+    shard is complete, so readers never see a partial shard. No file is created until
+    there is an entry to write to it. If the writer is used as a context manager and
+    an exception is raised, the shard being written is discarded.
+
+    Entries are serialized with `serializer`, a backend name from serializers.BACKENDS
+    (the fastest installed one by default).
+    """
+
+    def __init__(
+        self,
+        dest_dir,
+        name: str = "entries_{:03d}.jsonl",
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        buffer_size: int = BUFFER_SIZE,
+        serializer: Optional[str] = None,
+    ):
+        if (max_entries or max_bytes) and name.format(1) == name.format(2):
+            raise ValueError(f"cannot roll shards over a fixed name: {name}")
+        self.serialize = get_serializer(serializer)
+        self.dest_dir = Path(dest_dir)
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.buffer_size = buffer_size
+        self.paths: list[Path] = []
+        self._file = None
+        self._tmp_path = None
+        self._entries = 0
+        self._bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def _is_full(self, size: int) -> bool:
+        if self.max_entries and self._entries >= self.max_entries:
+            return True
+        return bool(self.max_bytes) and self._bytes + size > self.max_bytes
+
+    def _open_shard(self) -> None:
+        path = self.dest_dir / self.name.format(len(self.paths) + 1)
+        self.paths.append(path)
+        self._tmp_path = path.with_name(f".{path.name}.tmp")
+        self._file = open(self._tmp_path, "wb", buffering=self.buffer_size)
+        self._entries = 0
+        self._bytes = 0
+
+    def _close_shard(self) -> None:
+        self._file.close()
+        os.replace(self._tmp_path, self.paths[-1])
+        self._file = None
+
+    def write(self, entry: dict) -> None:
+        line = self.serialize(entry) + b"\n"
+        if self._file is not None and self._entries and self._is_full(len(line)):
+            self._close_shard()
+        if self._file is None:
+            self._open_shard()
+        self._file.write(line)
+        self._entries += 1
+        self._bytes += len(line)
+
+    def write_all(self, entries: Iterable[dict]) -> None:
+        for entry in entries:
+            self.write(entry)
+
+    def close(self) -> list[Path]:
+        """Finish the last shard and return the paths of all shards written."""
+        if self._file is not None:
+            self._close_shard()
+        return self.paths
+
+    def discard(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self._tmp_path)
+            self._file = None
+            self.paths.pop()
+
+
+def make_metadata(
+    label: str, kind: str, desto_path, urn: str, entries: Optional[Iterable] = None
+) -> None:
+    """
+    Write metadata.json for a dictionary in `desto_path`, listing `entries` (file
+    names or paths) or, by default, every .jsonl file there.
+    """
+    desto_path = Path(desto_path)
+    if entries is None:
+        entries = sorted(desto_path.glob("*.jsonl"))
+    entry_list = [Path(filename).name for filename in entries]
+
+    metadata = {"label": label, "urn": urn, "kind": kind, "entries": entry_list}
+
+    with open(desto_path / "metadata.json", "w") as f:
+        json.dump(metadata, f)
+
+    print("metadata.json file written")
@@ -8,13 +8,16 @@ to retain formatting, extract senses or citations.
 This will all come later (see LSJ).
 """
 
-import json
-
-from itertools import batched
+from pathlib import Path
 from lxml import etree
 
+from jsonl_writer import ShardedWriter, make_metadata
+from xml_entries import iter_entries
+
 
 FILENAME = "../../lexica/CTS_XML_TEI/perseus/pdllex/lat/ls/lat.ls.perseus-eng2.xml"
+DESTO_DIR = Path("../../test-data/dictionaries/ls")
+ENTRIES_PER_SHARD = 10000
 
 URN_PREFIX = "urn:cite2:scaife-viewer:dictionary-entries.atlas_v1:lat.ls.perseus-eng2"
 
@@ -22,8 +25,8 @@ URN_PREFIX = "urn:cite2:scaife-viewer:dictionary-entries.atlas_v1:lat.ls.perseus
 def to_string(el):
     return etree.tostring(el, with_tail=True, encoding="utf-8", method="text").decode("utf-8")
 
-def get_entries(root):
-    for entry in root.xpath("text/body/div0/entryFree"):
+def get_entries(filename):
+    for entry in iter_entries(filename, "entryFree", path=("text", "body", "div0"), exact=True):
         entry_id = entry.attrib["id"]
         entry_type = entry.attrib["type"]
         entry_key = entry.attrib["key"]
@@ -42,13 +45,7 @@ def get_entries(root):
             "urn": urn
         }
 
-tree = etree.parse(FILENAME)
-
-root = tree.getroot()
-
-for batch_num, batch in enumerate(batched(get_entries(root), 10000), 1):
-    with open(f"entries_{batch_num:03}.jsonl", "w") as f:
-        for entry in batch:
-            f.write(json.dumps(entry, ensure_ascii=False))
-            f.write("\n")
+with ShardedWriter(DESTO_DIR, max_entries=ENTRIES_PER_SHARD) as writer:
+    writer.write_all(get_entries(FILENAME))
 
+make_metadata("Lewis and Short Latin Dictionary", "Dictionary", DESTO_DIR, URN_PREFIX, writer.paths)
@@ -4,78 +4,35 @@
 Work-in-progress script to convert Helma Dik's XML of the LSJ to JSONL for Scaife ATLAS.
 """
 
+import argparse
+import os
 import re
-import json
 
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Optional
 from lxml import etree
-import unicodedata
+
+from citation_urns import process_citation_urn
+from jsonl_writer import ShardedWriter, make_metadata
+from markup import serialize, strip_tags
+from sense_tree import SenseTree
+from urn_registry import RecentUrns, check_urns
+from xml_entries import iter_entries
 
 LSJ_REPO = Path("../../../LSJ/dik_version")
 # LSJ_REPO_DEBUG = Path("../../../LSJ/dik_version/test")
 DESTO_DIR = Path("../../test-data/dictionaries/lsj")
 
 URN_PREFIX = "urn:cite2:scaife-viewer:dictionaries.v1:lsj"
+CITATION_URN_PREFIX = "urn:cite2:scaife-viewer:citations.atlas_v1:lsj-"
 
 
 # Note: can switch between pulling xml string vs. just text by changing default value of method
 # from "text" to "xml".
 def to_string(el, method="xml"):
-    text = etree.tostring(el, with_tail=True, encoding="utf-8", method=method).decode(
-        "utf-8"
-    )
-    # now remove all xml tags except for italicization
-    pattern = re.compile("<.+?>")
-    for match in re.findall(pattern, text):
-        if match != "<i>" and match != "</i>":
-            text = re.sub(re.escape(match), "", text)
-    return text
-
-
-def latinize(char):
-    mappings = {
-        "α": "a",
-        "β": "b",
-        "γ": "g",
-        "δ": "d",
-        "ε": "e",
-        "ζ": "z",
-        "η": "h",
-        "θ": "q",
-        "ι": "i",
-        "κ": "k",
-        "λ": "l",
-        "μ": "m",
-        "ν": "n",
-        "ξ": "c",
-        "ο": "o",
-        "π": "p",
-        "ρ": "r",
-        "σ": "s",
-        "ς": "s",
-        "ϲ": "s",
-        "τ": "t",
-        "υ": "u",
-        "φ": "f",
-        "χ": "x",
-        "ψ": "y",
-        "ω": "w",
-        chr(787): ")",  # smooth breathing
-        chr(788): "(",  # rough breathing
-        chr(769): "/",  # acute accent
-        chr(768): "\\",  # grave accent
-        chr(834): "=",  # circumflex accent
-        chr(837): "|",  # iota subscript
-    }
-    return mappings.get(char, "")
-
-
-def generate_key(greek_lemma):
-    key = []
-    for char in greek_lemma:
-        for element in unicodedata.normalize("NFD", char.lower()):
-            key.append(latinize(element))
-    return "".join(key)
+    # remove all xml tags except for italicization
+    return strip_tags(serialize(el, method=method))
 
 
 def normalize_whitespace(text):
@@ -85,29 +42,6 @@ def normalize_whitespace(text):
     return text
 
 
-def process_citation_urn(urn: str):
-    # these four lines deal with citation urns that have book and line number
-    pattern = r"(,\d+:\d+)(:*)(\d*)"
-    if len(re.findall(pattern, urn)) > 0 and len(re.findall(pattern, urn)[0][2]) > 0:
-        replacement = r"\1.\3"
-        urn = re.sub(pattern, replacement, urn)
-    urn = re.sub("Perseus:abo", "urn:cts:greekLit", urn)
-
-    # we want to replace the first "," with "" and the second "," with "."
-    # we also want to insert tlg after tlg#.
-    pattern = r"(.+)(,)(.+)(,)(.+)"
-    replacement = r"\1\3.tlg\5"
-    urn = re.sub(pattern, replacement, urn)
-
-    # go from urn:cts:greekLit:tlg0012.tlg001:8.409
-    # to urn:cts:greekLit:tlg0012.tlg001.perseus-grc2:8.409
-    pattern = r"(.+)(\.)(.+)(:)(.+)"
-    replacement = r"\1\2\3.perseus-grc2\4\5"
-    urn = re.sub(pattern, replacement, urn)
-
-    return urn
-
-
 def process_citations(child, counter):
     quote_parts = []
     for quote in child.xpath("quote"):
@@ -127,15 +61,14 @@ def process_citations(child, counter):
     counter["citation_count"] += 1
     ref, ref_urn = bibl_entries[0] if len(bibl_entries) > 0 else ("", "")
     return {
-        "urn": f"urn:cite2:scaife-viewer:citations.atlas_v1:lsj-{counter['citation_count']}",
+        "urn": f"{CITATION_URN_PREFIX}{counter['citation_count']}",
         "data": {"quote": quote, "ref": ref, "urn": ref_urn},
     }
 
 
-def process_sense_levels(sense, urn: str, parent_senses: list, counter: dict):
+def process_sense_levels(sense, senses: SenseTree, counter: dict):
     """
-    Modifies passed list parent_senses in place, adding dictionaries at top level
-    for each parent_senses, with each dict having a "children" field for list of sub_senses.
+    Adds the sense to the SenseTree `senses`, under the last sense added one level up.
     Relies on "level" attribute to infer sense hierarchy.
     """
     contents_list = []
@@ -151,7 +84,7 @@ def process_sense_levels(sense, urn: str, parent_senses: list, counter: dict):
             counter["citation_count"] += 1
             citations.append(
                 {
-                    "urn": f"urn:cite2:scaife-viewer:citations.atlas_v1:lsj-{counter['citation_count']}",
+                    "urn": f"{CITATION_URN_PREFIX}{counter['citation_count']}",
                     "data": {"quote": "", "ref": ref, "urn": ref_urn},
                 }
             )
@@ -159,265 +92,25 @@ def process_sense_levels(sense, urn: str, parent_senses: list, counter: dict):
         if text:
             contents_list.append(text)
     contents = " ".join(contents_list).strip()
-    if sense.attrib.get("level") == "0" or sense.attrib.get("level") is None:
-        sense_urn = f"{urn}-n{len(parent_senses)}"
-        parent_senses.append(
-            {
-                "label": sense.attrib.get("n"),
-                "definition": contents,
-                "urn": sense_urn,
-                "citations": citations,
-                "children": [],
-            }
-        )
-
-    elif sense.attrib["level"] == "1":
-        if len(parent_senses) == 0:
-            parent_senses.append(
-                {
-                    "definition": "",
-                    "urn": f"{urn}-0",
-                    "children": [],
-                }
-            )
-        parent_urn = parent_senses[-1]["urn"]
-        parent_num_children = len(parent_senses[-1]["children"])
-        sense_urn = f"{parent_urn}-{parent_num_children}"
-        parent_senses[-1]["children"].append(
-            {
-                "label": sense.attrib.get("n"),
-                "definition": contents,
-                "urn": sense_urn,
-                "citations": citations,
-                "children": [],
-            }
-        )
-
-    elif sense.attrib["level"] == "2":
-        if len(parent_senses) == 0:
-            parent_senses.append(
-                {
-                    "definition": "",
-                    "urn": f"{urn}-0",
-                    "children": [],
-                }
-            )
-
-        if len(parent_senses[-1]["children"]) == 0:
-            parent_senses[-1]["children"].append(
-                {
-                    "definition": "",
-                    "urn": f"{parent_senses[-1]['urn']}-0",
-                    "children": [],
-                }
-            )
-
-        parent_urn = parent_senses[-1]["children"][-1]["urn"]
-        parent_num_children = len(parent_senses[-1]["children"][-1]["children"])
-        sense_urn = f"{parent_urn}-{parent_num_children}"
-
-        parent_senses[-1]["children"][-1]["children"].append(
-            {
-                "label": sense.attrib.get("n"),
-                "definition": contents,
-                "urn": sense_urn,
-                "citations": citations,
-                "children": [],
-            }
-        )
-
-    elif sense.attrib["level"] == "3":
-        if len(parent_senses) == 0:
-            parent_senses.append(
-                {
-                    "definition": "",
-                    "urn": f"{urn}-0",
-                    "children": [],
-                }
-            )
-
-        if len(parent_senses[-1]["children"]) == 0:
-            parent_senses[-1]["children"].append(
-                {
-                    "definition": "",
-                    "urn": f"{parent_senses[-1]['urn']}-0",
-                    "children": [],
-                }
-            )
-
-        if len(parent_senses[-1]["children"][-1]["children"]) == 0:
-            parent_senses[-1]["children"][-1]["children"].append(
-                {
-                    "definition": "",
-                    "urn": f"{parent_senses[-1]['children'][-1]['urn']}-0",
-                    "children": [],
-                }
-            )
-
-        parent_urn = parent_senses[-1]["children"][-1]["children"][-1]["urn"]
-        parent_num_children = len(
-            parent_senses[-1]["children"][-1]["children"][-1]["children"]
-        )
-        sense_urn = f"{parent_urn}-{parent_num_children}"
-        parent_senses[-1]["children"][-1]["children"][-1]["children"].append(
-            {
-                "label": sense.attrib.get("n"),
-                "definition": contents,
-                "urn": sense_urn,
-                "citations": citations,
-                "children": [],
-            }
-        )
-
-    elif sense.attrib["level"] == "4":
-        if len(parent_senses) == 0:
-            parent_senses.append(
-                {
-                    "definition": "",
-                    "urn": f"{urn}-0",
-                    "children": [],
-                }
-            )
-
-        if len(parent_senses[-1]["children"]) == 0:
-            parent_senses[-1]["children"].append(
-                {
-                    "definition": "",
-                    "urn": f"{parent_senses[-1]['urn']}-0",
-                    "children": [],
-                }
-            )
-
-        if len(parent_senses[-1]["children"][-1]["children"]) == 0:
-            parent_senses[-1]["children"][-1]["children"].append(
-                {
-                    "definition": "",
-                    "urn": f"{parent_senses[-1]['children'][-1]['urn']}-0",
-                    "children": [],
-                }
-            )
-
-        if len(parent_senses[-1]["children"][-1]["children"][-1]["children"]) == 0:
-            parent_senses[-1]["children"][-1]["children"][-1]["children"].append(
-                {
-                    "definition": "",
-                    "urn": f"{parent_senses[-1]['children'][-1]['children'][-1]['urn']}-0",
-                    "children": [],
-                }
-            )
-
-        parent_urn = parent_senses[-1]["children"][-1]["children"][-1]["children"][-1][
-            "urn"
-        ]
-        parent_num_children = len(
-            parent_senses[-1]["children"][-1]["children"][-1]["children"][-1][
-                "children"
-            ]
-        )
-        sense_urn = f"{parent_urn}-{parent_num_children}"
-
-        parent_senses[-1]["children"][-1]["children"][-1]["children"][-1][
-            "children"
-        ].append(
-            {
-                "label": sense.attrib.get("n"),
-                "definition": contents,
-                "urn": sense_urn,
-                "citations": citations,
-                "children": [],
-            }
-        )
-
-    elif sense.attrib["level"] == "5":
-        if len(parent_senses) == 0:
-            parent_senses.append(
-                {
-                    "definition": "",
-                    "urn": f"{urn}-0",
-                    "children": [],
-                }
-            )
-
-        if len(parent_senses[-1]["children"]) == 0:
-            parent_senses[-1]["children"].append(
-                {
-                    "definition": "",
-                    "urn": f"{parent_senses[-1]['urn']}-0",
-                    "children": [],
-                }
-            )
-
-        if len(parent_senses[-1]["children"][-1]["children"]) == 0:
-            parent_senses[-1]["children"][-1]["children"].append(
-                {
-                    "definition": "",
-                    "urn": f"{parent_senses[-1]['children'][-1]['urn']}-0",
-                    "children": [],
-                }
-            )
-
-        if len(parent_senses[-1]["children"][-1]["children"][-1]["children"]) == 0:
-            parent_senses[-1]["children"][-1]["children"][-1]["children"].append(
-                {
-                    "definition": "",
-                    "urn": f"{parent_senses[-1]['children'][-1]['children'][-1]['urn']}-0",
-                    "children": [],
-                }
-            )
-
-        if (
-            len(
-                parent_senses[-1]["children"][-1]["children"][-1]["children"][-1][
-                    "children"
-                ]
-            )
-            == 0
-        ):
-            parent_senses[-1]["children"][-1]["children"][-1]["children"][-1][
-                "children"
-            ].append(
-                {
-                    "definition": "",
-                    "urn": f"{parent_senses[-1]['children'][-1]['children'][-1]['children'][-1]['urn']}-0",
-                    "children": [],
-                }
-            )
-
-        parent_urn = parent_senses[-1]["children"][-1]["children"][-1]["children"][-1][
-            "children"
-        ][-1]["urn"]
-        parent_num_children = len(
-            parent_senses[-1]["children"][-1]["children"][-1]["children"][-1][
-                "children"
-            ][-1]["children"]
-        )
-        sense_urn = f"{parent_urn}-{parent_num_children}"
-
-        parent_senses[-1]["children"][-1]["children"][-1]["children"][-1]["children"][
-            -1
-        ]["children"].append(
-            {
-                "label": sense.attrib.get("n"),
-                "definition": contents,
-                "urn": sense_urn,
-                "citations": citations,
-                "children": [],
-            }
-        )
-
-    return parent_senses
+    senses.add(
+        int(sense.attrib.get("level", 0)),
+        sense.attrib.get("n"),
+        contents,
+        citations=citations,
+    )
+    return senses
 
 
 def get_senses(entry, urn, counter: dict):
-    parent_senses = []
+    senses = SenseTree(urn)
     for sense in entry.xpath("sense"):
-        process_sense_levels(sense, urn, parent_senses, counter)
-    return parent_senses
+        process_sense_levels(sense, senses, counter)
+    return senses.senses
 
 
-def get_entries(root, counter: dict):
+def get_entries(filename, counter: dict):
     # div1 element has all entries, div2 has individual entry
-    for entry in root.xpath("text//div2"):
+    for entry in iter_entries(filename, "div2"):
         if not entry.attrib.get("key"):
             continue
         head = to_string(entry.xpath("head")[0]).split(",")[0].strip()
@@ -451,63 +144,74 @@ def get_entries(root, counter: dict):
         }
 
 
-def check_urns(jsonl_filepath, urns={}):
-    with open(jsonl_filepath, "r") as f:
-        for i, line in enumerate(f):
-            new_urn = json.loads(line)["urn"]
-            if new_urn in set(urns.keys()):
-                raise ValueError(
-                    f"There is a duplicated URN in line {i} of file {jsonl_filepath}. \
-                    The same urn was read in at line {urns[new_urn][1]} of file {urns[new_urn][0]}."
-                )
-            urns[new_urn] = (jsonl_filepath, i)
-    return urns
-
-
-def make_metadata(label, kind, desto_path, urn=None):
-    if urn is None:
-        try:
-            urn = URN_PREFIX
-        except TypeError:
-            print("No URN provided, so no metafile has been generated.")
-            return None
-
-    entry_list = []
-    for filename in sorted(desto_path.glob("*.jsonl")):
-        entry_list.append(str(filename).split("/")[-1])
-
-    metadata = {"label": label, "urn": urn, "kind": kind, "entries": entry_list}
+def convert_file(filename: Path, counter: dict) -> Optional[Path]:
+    num = filename.stem[-2:]
+    recent_urns = RecentUrns()
 
-    with open(f"{desto_path}/metadata.json", "w") as f:
-        json.dump(metadata, f)
+    # letter files without entries get no output file
+    with ShardedWriter(DESTO_DIR, name=f"entries_{num}.jsonl") as writer:
+        for entry in get_entries(filename, counter):
+            entry["urn"] = recent_urns.disambiguate(entry["urn"])
+            writer.write(entry)
+    return writer.paths[0] if writer.paths else None
 
-    print("metadata.json file written")
 
+def _convert_file_worker(filename: Path) -> tuple[Optional[Path], int]:
+    # citations are numbered from 1 in each file, and renumbered by the parent
+    counter = {"citation_count": 0}
+    dest = convert_file(filename, counter)
+    return dest, counter["citation_count"]
 
-urns = {}
-counter = {"citation_count": 0}
-# for filename in sorted(LSJ_REPO_DEBUG.glob("*.xml")):
-for filename in sorted(LSJ_REPO.glob("*.xml")):
-    tree = etree.parse(filename)
-    root = tree.getroot()
 
-    num = filename.stem[-2:]
-    prev_ten_urns = []
-
-    with open(f"{DESTO_DIR}/entries_{num}.jsonl", "w") as f:
-        for entry in get_entries(root, counter):
-            if entry["urn"] in set(prev_ten_urns):
-                for i, id in enumerate(prev_ten_urns):
-                    if entry["urn"] == id:
-                        entry["urn"] += f"_{i}"
-
-            if len(prev_ten_urns) == 10:
-                del prev_ten_urns[0]
-            prev_ten_urns.append(entry["urn"])
-            f.write(json.dumps(entry, ensure_ascii=False))
-            f.write("\n")
-# Note that this does not check for duplicates accross files
-
-for filename in sorted(DESTO_DIR.glob("*.jsonl")):
-    urns = check_urns(filename, urns)
-make_metadata("LSJ", "Dictionary", DESTO_DIR)
+def renumber_citations(jsonl_filepath: Path, offset: int) -> None:
+    """
+    Shift the numbers of the citation URNs in a converted file by `offset`.
+    Inside json strings quotes are escaped, so the pattern only matches the
+    "urn" fields of citations.
+    """
+    pattern = re.compile(f'"urn": "{re.escape(CITATION_URN_PREFIX)}(\\d+)"')
+
+    def shift(match):
+        return f'"urn": "{CITATION_URN_PREFIX}{int(match.group(1)) + offset}"'
+
+    tmp_path = jsonl_filepath.with_name(f".{jsonl_filepath.name}.tmp")
+    with open(jsonl_filepath) as src, open(tmp_path, "w") as dest:
+        for line in src:
+            dest.write(pattern.sub(shift, line))
+    os.replace(tmp_path, jsonl_filepath)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the LSJ to ATLAS JSONL.")
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="number of letter files to convert in parallel",
+    )
+    args = parser.parse_args()
+
+    # filenames = sorted(LSJ_REPO_DEBUG.glob("*.xml"))
+    filenames = sorted(LSJ_REPO.glob("*.xml"))
+    if args.jobs <= 1:
+        counter = {"citation_count": 0}
+        for filename in filenames:
+            convert_file(filename, counter)
+    else:
+        # citation URNs are numbered across the whole LSJ, so files are converted
+        # with their own counters and then shifted by the citations in the files
+        # before them, in the same order as a serial run
+        offset = 0
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            for dest, citation_count in executor.map(_convert_file_worker, filenames):
+                if offset and dest is not None:
+                    renumber_citations(dest, offset)
+                offset += citation_count
+
+    check_urns(sorted(DESTO_DIR.glob("*.jsonl")))
+    make_metadata("LSJ", "Dictionary", DESTO_DIR, URN_PREFIX)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+
+"""
+Turns dictionary XML elements into the strings stored in the JSONL definitions and
+citations: the element is serialized as XML and every tag but italics is dropped.
+Shared by the LSJ and Cunliffe conversion scripts.
+"""
+
+import functools
+import re
+
+from lxml import etree
+
+# a tag, as far as the conversion scripts are concerned; "." doesn't match newlines,
+# so neither does this
+TAG = re.compile("<.+?>")
+# the same, except for <i> and </i>
+NON_ITALIC_TAG = re.compile(r"<(?!/?i>).+?>")
+ITALICS = frozenset(("<i>", "</i>"))
+
+
+def serialize(el, method: str = "xml", with_tail: bool = True) -> str:
+    return etree.tostring(el, with_tail=with_tail, encoding="unicode", method=method)
+
+
+def _keep_italics_and_corr(match) -> str:
+    tag = match.group()
+    if tag in ITALICS or "corr" in tag[1:-1]:
+        return tag
+    return ""
+
+
+def strip_tags(text: str, keep_corr: bool = False) -> str:
+    """
+    Remove every tag from `text` except <i> and </i>, and, with `keep_corr`, any tag
+    mentioning "corr" (i.e. Cunliffe's <corr> corrections).
+    Tags are removed in a single pass rather than with one re.sub per tag found.
+    """
+    if keep_corr:
+        return TAG.sub(_keep_italics_and_corr, text)
+    return NON_ITALIC_TAG.sub("", text)
+
+
+@functools.lru_cache(maxsize=None)
+def _element_pattern(tag: str) -> re.Pattern:
+    return re.compile(f"<{tag}.+?{tag}>")
+
+
+def remove_elements(text: str, tags) -> str:
+    """remove whole <tag>...</tag> elements, contents included, from serialized xml"""
+    for tag in tags:
+        text = _element_pattern(tag).sub("", text)
+    return text
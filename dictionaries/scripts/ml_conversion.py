@@ -8,21 +8,24 @@ to retain formatting, extract senses or citations.
 This will all come later (see LSJ).
 """
 
-import json
-
 from pathlib import Path
 from lxml import etree
 
+from jsonl_writer import ShardedWriter, make_metadata
+from xml_entries import iter_entries
+
 ML_REPO = Path("../../../MiddleLiddell")
+DESTO_DIR = Path("../../test-data/dictionaries/middle-liddell")
 
 URN_PREFIX = "urn:cite2:scaife-viewer:dictionary-entries.atlas_v1:middle-liddell.perseus-eng2"
+METADATA_URN = "urn:cite2:scaife-viewer:dictionaries.v1:middle-liddell"
 
 def to_string(el):
     return etree.tostring(el, with_tail=True, encoding="utf-8", method="text").decode("utf-8")
 
-def get_entries(root):
+def get_entries(filename):
     seen_ids = set()
-    for entry in root.xpath("text//div1"):
+    for entry in iter_entries(filename, "div1"):
         entry_orig_id = entry.attrib["orig_id"]
         entry_key = entry.attrib["key"]
 
@@ -46,14 +49,12 @@ def get_entries(root):
         }
 
 
+shards = []
 for filename in sorted(ML_REPO.glob("*.xml")):
-    tree = etree.parse(filename)
-    root = tree.getroot()
-
     num = filename.stem[-2:]
 
-    with open(f"entries_{num:02}.jsonl", "w") as f:
-        for entry in get_entries(root):
-            f.write(json.dumps(entry, ensure_ascii=False))
-            f.write("\n")
+    with ShardedWriter(DESTO_DIR, name=f"entries_{num}.jsonl") as writer:
+        writer.write_all(get_entries(filename))
+    shards += writer.paths
 
+make_metadata("Middle Liddell", "Dictionary", DESTO_DIR, METADATA_URN, shards)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+
+"""
+Declarative schemas for the JSON records ATLAS ingests: dictionary entries,
+commentary glossae, syntax trees, text alignments and token annotations.
+
+A Schema lists the required and optional properties of a record and what each holds:
+a type (or tuple of types), another Schema, ListOf(...) one of those, SELF for the
+schema being defined, or None for anything. It is compiled once into a checker that
+compares a record's keys against frozensets and only looks further at properties
+with a nested schema or a type, counting what is wrong in a Counter.
+"""
+
+from collections import Counter
+from typing import Any, Callable, Optional
+
+Checker = Callable[[Any, Counter], None]
+
+# the schema a property belongs to, for recursive schemas such as senses
+SELF = object()
+
+
+class ListOf:
+    def __init__(self, item):
+        self.item = item
+
+
+def _type_names(types) -> str:
+    if isinstance(types, type):
+        types = (types,)
+    return " or ".join("null" if t is type(None) else t.__name__ for t in types)
+
+
+class Schema:
+    """
+    `required` and `optional` map property names to what they hold. Properties not
+    in either are reported as unexpected, unless `extra` is set.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        required: dict,
+        optional: Optional[dict] = None,
+        extra: bool = False,
+    ):
+        self.name = name
+        self.required = required
+        self.optional = optional or {}
+        self.extra = extra
+        self.check = self._compile()
+
+    @property
+    def properties(self) -> frozenset:
+        return frozenset(self.required) | frozenset(self.optional)
+
+    def errors(self, record) -> Counter:
+        error_counts = Counter()
+        self.check(record, error_counts)
+        return error_counts
+
+    def _compile_value(self, key: str, spec) -> Optional[Checker]:
+        if spec is None:
+            return None
+        if spec is SELF:
+            return lambda value, error_counts: self.check(value, error_counts)
+        if isinstance(spec, Schema):
+            return spec.check
+        if isinstance(spec, ListOf):
+            check_item = self._compile_value(key, spec.item)
+            message = f"Expected a list for {self.name} property '{key}'"
+
+            def check_list(value, error_counts):
+                if type(value) is not list:
+                    error_counts[message] += 1
+                elif check_item is not None:
+                    for item in value:
+                        check_item(item, error_counts)
+
+            return check_list
+
+        message = f"Expected {_type_names(spec)} for {self.name} property '{key}'"
+
+        def check_type(value, error_counts):
+            if not isinstance(value, spec):
+                error_counts[message] += 1
+
+        return check_type
+
+    def _compile(self) -> Checker:
+        name = self.name
+        required = frozenset(self.required)
+        allowed = self.properties
+        extra = self.extra
+        checkers = []
+        for key, spec in {**self.required, **self.optional}.items():
+            check_value = self._compile_value(key, spec)
+            if check_value is not None:
+                checkers.append((key, check_value))
+        not_an_object = f"Expected an object for {name}"
+
+        def check(record, error_counts):
+            if type(record) is not dict:
+                error_counts[not_an_object] += 1
+                return
+            keys = record.keys()
+            if not keys >= required:
+                for key in required - keys:
+                    error_counts[f"Missing {name} {key}"] += 1
+            if not extra and not keys <= allowed:
+                for key in keys - allowed:
+                    error_counts[f"Unexpected {name} property '{key}'"] += 1
+            for key, check_value in checkers:
+                if key in record:
+                    check_value(record[key], error_counts)
+
+        return check
+
+
+NULLABLE_STR = (str, type(None))
+
+CITATION = Schema(
+    "citation",
+    required={
+        "urn": str,
+        "data": Schema(
+            "citation data",
+            required={},
+            optional={"ref": NULLABLE_STR, "quote": str, "urn": NULLABLE_STR},
+        ),
+    },
+)
+
+SENSE = Schema(
+    "sense",
+    required={"urn": str, "definition": str},
+    optional={
+        "label": NULLABLE_STR,
+        "children": ListOf(SELF),
+        "citations": ListOf(CITATION),
+    },
+)
+
+DICTIONARY_ENTRY = Schema(
+    "entry",
+    required={"urn": str, "headword": str},
+    optional={
+        "definition": str,
+        "senses": ListOf(SENSE),
+        "citations": ListOf(CITATION),
+        "key": str,
+        "type": NULLABLE_STR,
+        "headword_display": str,
+        # Middle Liddell, Lewis and Short and the short definitions keep their
+        # content under "data" instead
+        "data": Schema(
+            "entry data",
+            required={"content": str},
+            optional={"key": str, "type": str},
+        ),
+    },
+)
+
+GLOSSA = Schema(
+    "glossa",
+    required={"urn": str, "corresp": str, "content": str},
+    optional={"citations": ListOf(CITATION)},
+)
+
+SYNTAX_TREE = Schema(
+    "syntax tree",
+    required={
+        "urn": str,
+        "treebank_id": (int, str),
+        "words": ListOf(
+            Schema(
+                "word",
+                required={"id": int, "value": str, "head_id": int, "relation": str},
+                optional={"lemma": str, "tag": str, "original_head_id": int},
+            )
+        ),
+    },
+    optional={"references": ListOf(str), "citation": NULLABLE_STR},
+)
+
+ALIGNMENT = Schema(
+    "alignment",
+    required={
+        "urn": str,
+        "label": str,
+        "format": str,
+        "versions": ListOf(str),
+        "records": ListOf(
+            Schema(
+                "alignment record",
+                required={"urn": str, "relations": ListOf(ListOf(str))},
+                optional={
+                    "metadata": Schema(
+                        "alignment record metadata",
+                        required={},
+                        optional={
+                            "label": str,
+                            "items": ListOf(ListOf(ListOf(NULLABLE_STR))),
+                        },
+                    )
+                },
+            )
+        ),
+    },
+    optional={
+        "enable_prototype": bool,
+        "parallel": str,
+        "display_options": Schema(
+            "display options", required={}, optional={"hovering_enabled": bool}
+        ),
+    },
+)
+
+# a row of a token annotations CSV file; every column after these is an annotation
+TOKEN_ANNOTATION = Schema(
+    "token annotation", required={"ve_ref": str, "value": str}, extra=True
+)
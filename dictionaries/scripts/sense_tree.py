@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+
+"""
+Builds the nested "senses" list of a dictionary entry from a flat sequence of
+<sense> elements whose hierarchy is given by their "level" attribute.
+Shared by the LSJ and elementary Latin conversion scripts.
+"""
+
+from typing import Any, Optional
+
+
+class SenseTree:
+    """
+    Keeps the last sense at each depth, so that a sense is attached to its parent
+    without walking down from the top of the tree.
+
+    Sense URNs extend their parent's URN: top-level senses get `{urn}-n{i}` and
+    sub-senses `{parent_urn}-{i}`, where i is the position among their siblings,
+    unless a `sense_id` is given, in which case it is `{parent_urn}-{sense_id}` at
+    every depth. A sense whose parent is missing (e.g. a level "2" sense directly
+    under a level "0" one) gets empty placeholder parents with URNs ending in "-0".
+    """
+
+    def __init__(self, urn: str):
+        self.urn = urn
+        self.senses: list = []
+        # self._path[d] is the last sense added at depth d
+        self._path: list = []
+
+    def _children(self, depth: int) -> list:
+        return self.senses if depth == 0 else self._path[depth - 1]["children"]
+
+    def _urn(self, depth: int) -> str:
+        return self.urn if depth == 0 else self._path[depth - 1]["urn"]
+
+    def add(
+        self,
+        depth: int,
+        label: Optional[str],
+        definition: str,
+        sense_id: Optional[str] = None,
+        **fields: Any,
+    ) -> dict:
+        """
+        Add a sense at `depth` (0 for top-level senses) under the last sense added one
+        level up. Extra `fields` (e.g. citations) go between the URN and the children.
+        """
+        del self._path[depth:]
+        while len(self._path) < depth:
+            placeholder = {
+                "definition": "",
+                "urn": f"{self._urn(len(self._path))}-0",
+                "children": [],
+            }
+            self._children(len(self._path)).append(placeholder)
+            self._path.append(placeholder)
+
+        siblings = self._children(depth)
+        if sense_id is not None:
+            sense_urn = f"{self._urn(depth)}-{sense_id}"
+        elif depth == 0:
+            sense_urn = f"{self.urn}-n{len(siblings)}"
+        else:
+            sense_urn = f"{self._urn(depth)}-{len(siblings)}"
+        sense = {
+            "label": label,
+            "definition": definition,
+            "urn": sense_urn,
+            **fields,
+            "children": [],
+        }
+        siblings.append(sense)
+        self._path.append(sense)
+        return sense
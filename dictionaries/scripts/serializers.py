@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+
+"""
+JSON serialization for the dictionary conversion scripts. Whichever backend is used,
+an entry comes out as the UTF-8 bytes of json.dumps(entry, ensure_ascii=False).
+
+msgspec and orjson only write compact JSON, so their output is reformatted:
+msgspec.json.format with indent=0 gives json.dumps' ", " and ": " separators on
+one line, and orjson's indented output has its line breaks and indentation removed,
+which is safe because a newline inside a string is always escaped.
+
+Entries are made of strings, ints, bools, None, lists and dicts with string keys;
+floats in exponent notation, NaN and non-string keys other than ints are written
+differently by msgspec and orjson, so entries holding them should use "json".
+"""
+
+import json
+import re
+from typing import Any, Callable, Optional
+
+Serializer = Callable[[Any], bytes]
+Deserializer = Callable[[bytes], Any]
+
+ORJSON_LINE_BREAK = re.compile(rb"\n *")
+ORJSON_ITEM_BREAK = re.compile(rb",\n *")
+
+
+def stdlib_serializer() -> Serializer:
+    # json.dumps builds a new JSONEncoder on every call when given options
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+
+    def dumps(obj: Any) -> bytes:
+        return encode(obj).encode("utf-8")
+
+    return dumps
+
+
+def msgspec_serializer() -> Serializer:
+    import msgspec
+
+    encode = msgspec.json.Encoder().encode
+    format = msgspec.json.format
+
+    def dumps(obj: Any) -> bytes:
+        return format(encode(obj), indent=0)
+
+    return dumps
+
+
+def orjson_serializer() -> Serializer:
+    import orjson
+
+    options = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj: Any) -> bytes:
+        indented = orjson.dumps(obj, option=options)
+        return ORJSON_LINE_BREAK.sub(b"", ORJSON_ITEM_BREAK.sub(b", ", indented))
+
+    return dumps
+
+
+# fastest first
+BACKENDS = {
+    "msgspec": msgspec_serializer,
+    "orjson": orjson_serializer,
+    "json": stdlib_serializer,
+}
+
+
+def get_serializer(backend: Optional[str] = None) -> Serializer:
+    """
+    A function from an entry to its JSON as bytes, using `backend` or, by default,
+    the first of BACKENDS that is installed.
+    """
+    if backend is not None:
+        return BACKENDS[backend]()
+    for make_serializer in (msgspec_serializer, orjson_serializer):
+        try:
+            return make_serializer()
+        except ImportError:
+            continue
+    return stdlib_serializer()
+
+
+def stdlib_deserializer() -> Deserializer:
+    return json.loads
+
+
+def msgspec_deserializer() -> Deserializer:
+    import msgspec
+
+    return msgspec.json.Decoder().decode
+
+
+def orjson_deserializer() -> Deserializer:
+    import orjson
+
+    return orjson.loads
+
+
+DESERIALIZER_BACKENDS = {
+    "msgspec": msgspec_deserializer,
+    "orjson": orjson_deserializer,
+    "json": stdlib_deserializer,
+}
+
+
+def get_deserializer(backend: Optional[str] = None) -> Deserializer:
+    """
+    The reverse of get_serializer: a function from JSON, as bytes, to the object it
+    holds, using `backend` or, by default, the first of BACKENDS that is installed.
+    """
+    if backend is not None:
+        return DESERIALIZER_BACKENDS[backend]()
+    for make_deserializer in (msgspec_deserializer, orjson_deserializer):
+        try:
+            return make_deserializer()
+        except ImportError:
+            continue
+    return stdlib_deserializer()
@@ -0,0 +1,24 @@
+from pathlib import Path
+
+from citation_urns import process_citation_urn
+
+# <bibl n="..."> ids and the URNs the LSJ conversion wrote for them, covering each
+# cited work and each shape of id in test-data/dictionaries/lsj/entries_*.jsonl
+GOLDEN = Path(__file__).parent / "citation_urns_golden.tsv"
+
+
+def test_process_citation_urn():
+    x = process_citation_urn("Perseus:abo:tlg,0012,001:8:409")
+    assert x == "urn:cts:greekLit:tlg0012.tlg001.perseus-grc2:8.409", x
+
+
+def test_process_citation_urn_golden():
+    with open(GOLDEN, encoding="utf-8") as f:
+        pairs = [line.rstrip("\n").split("\t") for line in f]
+    mismatches = [
+        (n, urn, process_citation_urn(n))
+        for n, urn in pairs
+        if process_citation_urn(n) != urn
+    ]
+    assert len(pairs) > 2000
+    assert not mismatches, mismatches[:5]
@@ -0,0 +1,42 @@
+from schemas import DICTIONARY_ENTRY, GLOSSA, SYNTAX_TREE
+
+
+def test_dictionary_entry():
+    entry = {
+        "urn": "urn:cite2:scaife-viewer:dictionary-entries.atlas_v1:lsj-1",
+        "headword": "ἀάατος",
+        "definition": "",
+        "senses": [
+            {
+                "urn": "urn:cite2:scaife-viewer:dictionary-sense.atlas_v1:lsj-1-n1",
+                "definition": "<i>not to be</i>",
+                "label": None,
+                "children": [{"urn": "lsj-1-n1-1", "label": 1, "extra": ""}],
+                "citations": [{"urn": "c1", "data": {"ref": "Il. 1.1", "urn": None}}],
+            }
+        ],
+    }
+    x = DICTIONARY_ENTRY.errors(entry)
+    assert x == {
+        "Missing sense definition": 1,
+        "Unexpected sense property 'extra'": 1,
+        "Expected str or null for sense property 'label'": 1,
+    }, x
+
+
+def test_glossa():
+    x = GLOSSA.errors({"urn": "g1", "content": "", "citations": {}})
+    assert x == {
+        "Missing glossa corresp": 1,
+        "Expected a list for glossa property 'citations'": 1,
+    }, x
+
+
+def test_syntax_tree():
+    word = {"id": 1, "value": "μῆνιν", "head_id": 0, "relation": "OBJ"}
+    tree = {"urn": "t1", "treebank_id": 1, "words": [word, {**word, "id": "2"}, []]}
+    x = SYNTAX_TREE.errors(tree)
+    assert x == {
+        "Expected int for word property 'id'": 1,
+        "Expected an object for word": 1,
+    }, x
@@ -0,0 +1,47 @@
+import json
+from itertools import islice
+from pathlib import Path
+
+import pytest
+
+from serializers import BACKENDS, get_serializer
+
+DICTIONARIES_DIR = Path(__file__).parent / "../../test-data/dictionaries"
+
+SAMPLES = [
+    {"a": [1, {"b": "x,\n  y"}], "c": {}, "d": [], "e": None, "f": True, "g": -3},
+    {"headword": "ἀάατος", "definition": "<i>not to be</i>   \x1f \x7f é"},
+    ["", {"": ""}, [[]], '\\"', "\t\r\n"],
+    {1: "int keys", "nested": {"κ": {"k": [0, 10**18]}}},
+]
+
+
+def installed_backends():
+    for name in BACKENDS:
+        try:
+            get_serializer(name)
+        except ImportError:
+            continue
+        yield name
+
+
+def sample_entries():
+    for dictionary in ("lsj", "middle-liddell"):
+        path = sorted((DICTIONARIES_DIR / dictionary).glob("entries_*.jsonl"))[0]
+        with open(path, encoding="utf-8") as f:
+            yield from (json.loads(line) for line in islice(f, 500))
+
+
+@pytest.mark.parametrize("backend", list(installed_backends()))
+def test_serializer_matches_json_dumps(backend):
+    dumps = get_serializer(backend)
+    for entry in [*SAMPLES, *sample_entries()]:
+        x = dumps(entry)
+        expected = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        assert x == expected, x
+        assert json.loads(x) == json.loads(expected)
+
+
+def test_get_serializer_default():
+    x = get_serializer()(SAMPLES[0])
+    assert x == json.dumps(SAMPLES[0], ensure_ascii=False).encode("utf-8"), x
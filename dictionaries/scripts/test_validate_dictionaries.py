@@ -0,0 +1,61 @@
+import json
+
+from validate_dictionaries import report, validate
+
+
+def write_dictionary(path, entries_files):
+    path.mkdir()
+    metadata = {
+        "label": path.name,
+        "urn": f"urn:cite2:scaife-viewer:dictionaries.v1:{path.name}",
+        "kind": "Dictionary",
+        "entries": list(entries_files),
+    }
+    (path / "metadata.json").write_text(json.dumps(metadata))
+    for filename, entries in entries_files.items():
+        with open(path / filename, "w") as f:
+            f.writelines(json.dumps(entry) + "\n" for entry in entries)
+
+
+def entry(urn, sense_urns):
+    return {
+        "urn": urn,
+        "headword": urn,
+        "definition": "",
+        "senses": [{"urn": u, "definition": "", "children": []} for u in sense_urns],
+    }
+
+
+def test_validate_counts_duplicates_across_files(tmp_path):
+    write_dictionary(
+        tmp_path / "a",
+        {
+            "entries_01.jsonl": [entry("a1", ["s1", "s2"]), entry("a2", ["s2"])],
+            "entries_02.jsonl": [entry("a3", ["s1", "s1", "s3"])],
+        },
+    )
+    write_dictionary(tmp_path / "b", {"entries_01.jsonl": [entry("b1", ["s3"])]})
+
+    x = report(validate(tmp_path, jobs=2))
+    assert x["dictionaries"] == {
+        str(tmp_path / "a"): {
+            "entries_01.jsonl": {"Duplicate sense urn 's2'": 1},
+            "entries_02.jsonl": {"Duplicate sense urn 's1'": 2},
+        },
+        str(tmp_path / "b"): {"entries_01.jsonl": {"Duplicate sense urn 's3'": 1}},
+    }, x
+    assert not x["ok"]
+
+
+def test_validate_fail_fast(tmp_path):
+    write_dictionary(
+        tmp_path / "a",
+        {
+            "entries_01.jsonl": [entry("a1", ["s1"])],
+            "entries_02.jsonl": [{"urn": "a2"}],
+            "entries_03.jsonl": [{"urn": "a3"}],
+        },
+    )
+
+    x = [result.path.name for result in validate(tmp_path, fail_fast=True)]
+    assert x == ["entries_01.jsonl", "entries_02.jsonl"], x
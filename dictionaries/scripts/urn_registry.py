@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+"""
+Duplicate URN detection for the dictionary conversion scripts.
+"""
+
+import json
+from collections import deque
+from typing import Iterable, Optional
+
+
+class UrnRegistry:
+    """
+    URNs seen so far, each with the file and line it was first read at.
+    A URN seen again is recorded as a collision rather than raising, so that all of
+    them can be reported at once.
+    """
+
+    def __init__(self):
+        self.first_seen: dict[str, tuple[str, int]] = {}
+        # (urn, (file, line) first seen at, (file, line) seen again at)
+        self.collisions: list[tuple[str, tuple[str, int], tuple[str, int]]] = []
+
+    def __contains__(self, urn: str) -> bool:
+        return urn in self.first_seen
+
+    def __len__(self) -> int:
+        return len(self.first_seen)
+
+    def add(self, urn: str, filename, line: int) -> bool:
+        """Returns False, and records the collision, if `urn` has been seen before."""
+        first_seen = self.first_seen.setdefault(urn, (str(filename), line))
+        if first_seen != (str(filename), line):
+            self.collisions.append((urn, first_seen, (str(filename), line)))
+            return False
+        return True
+
+    def add_file(self, jsonl_filepath) -> None:
+        with open(jsonl_filepath, "r") as f:
+            for i, line in enumerate(f, 1):
+                self.add(json.loads(line)["urn"], jsonl_filepath, i)
+
+    def merge(self, other: "UrnRegistry") -> None:
+        """Add the URNs of `other`, e.g. one filled in by another process, in order."""
+        for urn, (filename, line) in other.first_seen.items():
+            self.add(urn, filename, line)
+        self.collisions.extend(other.collisions)
+
+    def report(self) -> str:
+        return "\n".join(
+            f"Duplicated URN {urn} in line {line} of file {filename}. "
+            f"The same urn was read in at line {first_line} of file {first_filename}."
+            for urn, (first_filename, first_line), (filename, line) in self.collisions
+        )
+
+
+def check_urns(
+    jsonl_filepaths: Iterable, registry: Optional[UrnRegistry] = None
+) -> UrnRegistry:
+    """
+    Check that entry URNs are unique within and across `jsonl_filepaths`, raising a
+    ValueError listing every duplicate if they are not.
+    """
+    if registry is None:
+        registry = UrnRegistry()
+    for jsonl_filepath in jsonl_filepaths:
+        registry.add_file(jsonl_filepath)
+    if registry.collisions:
+        raise ValueError(
+            f"{len(registry.collisions)} duplicated URNs:\n{registry.report()}"
+        )
+    return registry
+
+
+class RecentUrns:
+    """
+    The last `size` entry URNs written to a file. An entry repeating one of them gets
+    "_{i}" appended to its URN, i being the position of the repeated URN.
+    """
+
+    def __init__(self, size: int = 10):
+        self.urns = deque(maxlen=size)
+
+    def disambiguate(self, urn: str) -> str:
+        if urn in self.urns:
+            for i, seen in enumerate(self.urns):
+                if urn == seen:
+                    urn += f"_{i}"
+        self.urns.append(urn)
+        return urn
@@ -1,91 +1,105 @@
 #!/usr/bin/env python3
 
-# This script can be used from the CLI by passing in a directory path.
+# This script can be used from the CLI by passing in a directory path:
+#     python validate_dictionaries.py [--jobs N] [--fail-fast] [--json] DIRECTORY
+# Each entries file is checked in a worker process; sense and citation URNs must be
+# unique across all of the dictionaries in DIRECTORY.
 
+import argparse
 import collections
 import json
 import pathlib
 import sys
-
-import jsonlines
-
-sense_urns = set()
-citation_urns = set()
-
-
-def process_senses(senses, error_counts):
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from serializers import get_deserializer
+
+ENTRY_PROPERTIES = frozenset(
+    [
+        "urn",
+        "headword",
+        "definition",
+        "senses",
+        "citations",
+        "key",
+        "type",
+        "headword_display",
+    ]
+)
+SENSE_PROPERTIES = frozenset(["label", "urn", "definition", "children", "citations"])
+CITATION_PROPERTIES = frozenset(["urn", "ref", "quote", "target"])
+
+
+@dataclass
+class FileResult:
+    """
+    What a worker found in one entries file: its error counts, counting URNs
+    repeated within the file, and the sense and citation URNs it holds, so that the
+    parent can count the ones repeated across files.
+    """
+
+    path: pathlib.Path
+    missing: bool = False
+    error_counts: collections.Counter = field(default_factory=collections.Counter)
+    sense_urns: set = field(default_factory=set)
+    citation_urns: set = field(default_factory=set)
+
+
+def process_senses(senses, result):
+    error_counts = result.error_counts
     for sense in senses:
         if "urn" not in sense:
             error_counts["Missing sense urn"] += 1
         if "definition" not in sense:
             error_counts["Missing sense definition"] += 1
 
-        for key in sense.keys():
-            if key not in [
-                "label",
-                "urn",
-                "definition",
-                "children",
-                "citations",
-            ]:
+        if not sense.keys() <= SENSE_PROPERTIES:
+            for key in sense.keys() - SENSE_PROPERTIES:
                 error_counts[f"Unexpected sense property '{key}'"] += 1
 
-        if sense["urn"] in sense_urns:
-            error_counts[f"Duplicate sense urn '{sense['urn']}'"] += 1
-        sense_urns.add(sense["urn"])
+        if "urn" in sense:
+            if sense["urn"] in result.sense_urns:
+                error_counts[f"Duplicate sense urn '{sense['urn']}'"] += 1
+            result.sense_urns.add(sense["urn"])
 
         if "citations" in sense:
-            process_citations(sense["citations"], error_counts)
+            process_citations(sense["citations"], result)
         if "children" in sense:
-            process_senses(sense["children"], error_counts)
+            process_senses(sense["children"], result)
 
 
-def process_citations(citations, error_counts):
+def process_citations(citations, result):
+    error_counts = result.error_counts
     for citation in citations:
         if "urn" not in citation:
             error_counts["Missing citation urn"] += 1
         if "ref" not in citation:
             error_counts["Missing citation ref"] += 1
 
-        for key in citation.keys():
-            if key not in [
-                "urn",
-                "ref",
-                "quote",
-                "target",
-            ]:
+        if not citation.keys() <= CITATION_PROPERTIES:
+            for key in citation.keys() - CITATION_PROPERTIES:
                 error_counts[f"Unexpected sense property '{key}'"] += 1
 
-        if citation["urn"] in citation_urns:
-            error_counts[f"Duplicate citation urn '{citation['urn']}'"] += 1
-        citation_urns.add(citation["urn"])
-
-
-dictionaries_path = pathlib.Path(sys.argv[1])
-
-for dictionary_dir in dictionaries_path.iterdir():
-    if not dictionary_dir.is_dir():
-        continue
-
-    print()
-    print(dictionary_dir)
-
-    metadata = json.load((dictionary_dir / "metadata.json").open())
-
-    assert metadata.keys() == {"label", "urn", "kind", "entries"}
-
-    assert metadata["kind"] == "Dictionary"
-
-    for entries_filename in metadata["entries"]:
-        error_counts = collections.Counter()
-
-        try:
-            entries = jsonlines.open(dictionary_dir / entries_filename)
-        except FileNotFoundError:
-            print(f"  Missing entries file: {entries_filename}")
-            continue
-
-        for entry in entries:
+        if "urn" in citation:
+            if citation["urn"] in result.citation_urns:
+                error_counts[f"Duplicate citation urn '{citation['urn']}'"] += 1
+            result.citation_urns.add(citation["urn"])
+
+
+def validate_entries_file(path: pathlib.Path) -> FileResult:
+    result = FileResult(path)
+    loads = get_deserializer()
+    error_counts = result.error_counts
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        result.missing = True
+        return result
+
+    with f:
+        for line in f:
+            entry = loads(line)
             if "urn" not in entry:
                 error_counts["Missing urn"] += 1
             if "headword" not in entry:
@@ -93,24 +107,124 @@ for dictionary_dir in dictionaries_path.iterdir():
             if "definition" not in entry:
                 error_counts["Missing definition"] += 1
             if "senses" in entry:
-                process_senses(entry["senses"], error_counts)
+                process_senses(entry["senses"], result)
             if "citations" in entry:
-                process_citations(entry["citations"], error_counts)
-            for key in entry.keys():
-                if key not in [
-                    "urn",
-                    "headword",
-                    "definition",
-                    "senses",
-                    "citations",
-                    "key",
-                    "type",
-                    "headword_display",
-                ]:
+                process_citations(entry["citations"], result)
+            if not entry.keys() <= ENTRY_PROPERTIES:
+                for key in entry.keys() - ENTRY_PROPERTIES:
                     error_counts[f"Unexpected entry property '{key}'"] += 1
 
-        if error_counts:
-            print(f"  Errors in {entries_filename}:")
-        for error, count in error_counts.items():
-            print(f"    {error}: {count}")
+    return result
+
+
+def iter_entries_files(dictionaries_path: pathlib.Path):
+    for dictionary_dir in sorted(dictionaries_path.iterdir()):
+        if not dictionary_dir.is_dir():
+            continue
 
+        metadata = json.load((dictionary_dir / "metadata.json").open())
+
+        assert metadata.keys() == {"label", "urn", "kind", "entries"}
+
+        assert metadata["kind"] == "Dictionary"
+
+        for entries_filename in metadata["entries"]:
+            yield dictionary_dir / entries_filename
+
+
+def validate(dictionaries_path: pathlib.Path, jobs=None, fail_fast=False):
+    """
+    Yields a FileResult for each entries file, in order, with the sense and
+    citation URNs already seen in an earlier file counted as duplicates. With
+    `fail_fast`, stops after the first file with errors.
+    """
+    sense_urns = set()
+    citation_urns = set()
+
+    with ProcessPoolExecutor(jobs) as executor:
+        results = executor.map(
+            validate_entries_file, iter_entries_files(dictionaries_path)
+        )
+        for result in results:
+            for urn in result.sense_urns & sense_urns:
+                result.error_counts[f"Duplicate sense urn '{urn}'"] += 1
+            for urn in result.citation_urns & citation_urns:
+                result.error_counts[f"Duplicate citation urn '{urn}'"] += 1
+            sense_urns |= result.sense_urns
+            citation_urns |= result.citation_urns
+
+            yield result
+
+            if fail_fast and (result.missing or result.error_counts):
+                executor.shutdown(cancel_futures=True)
+                return
+
+
+def print_result(result, dictionary_dir):
+    if result.path.parent != dictionary_dir:
+        print()
+        print(result.path.parent)
+
+    if result.missing:
+        print(f"  Missing entries file: {result.path.name}")
+        return
+
+    if result.error_counts:
+        print(f"  Errors in {result.path.name}:")
+    for error, count in result.error_counts.items():
+        print(f"    {error}: {count}")
+
+
+def report(results) -> dict:
+    dictionaries = collections.defaultdict(dict)
+    for result in results:
+        dictionaries[str(result.path.parent)][result.path.name] = (
+            {"missing": True} if result.missing else dict(result.error_counts)
+        )
+    return {
+        "ok": not any(
+            errors for files in dictionaries.values() for errors in files.values()
+        ),
+        "dictionaries": dictionaries,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("dictionaries_path", type=pathlib.Path)
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="number of worker processes (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="stop at the first entries file with errors",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="print a JSON report of the errors in each entries file",
+    )
+    args = parser.parse_args()
+
+    results = []
+    dictionary_dir = None
+    for result in validate(args.dictionaries_path, args.jobs, args.fail_fast):
+        results.append(result)
+        if not args.json:
+            print_result(result, dictionary_dir)
+            dictionary_dir = result.path.parent
+
+    validation_report = report(results)
+    if args.json:
+        print(json.dumps(validation_report, indent=2, ensure_ascii=False))
+
+    sys.exit(0 if validation_report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+# Checks every dictionary, commentary, syntax tree, alignment and token annotation
+# file under test-data/ against its schema in schemas.py and reports how many records
+# each format has, the errors found and how fast they were checked:
+#     python validate_test_data.py [--format FORMAT ...] [--json] [TEST_DATA_DIR]
+
+import argparse
+import collections
+import csv
+import json
+import pathlib
+import sys
+import time
+
+import schemas
+from serializers import get_deserializer
+
+TEST_DATA_DIR = pathlib.Path(__file__).parent / "../../test-data"
+
+
+def iter_jsonl(path, loads):
+    with open(path, "rb") as f:
+        for line in f:
+            yield loads(line)
+
+
+def iter_json_list(path, loads):
+    with open(path, "rb") as f:
+        yield from loads(f.read())
+
+
+def iter_json(path, loads):
+    with open(path, "rb") as f:
+        yield loads(f.read())
+
+
+def iter_csv(path, loads):
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+# format: (schema, record reader, file patterns relative to the test-data directory)
+FORMATS = {
+    "dictionary": (
+        schemas.DICTIONARY_ENTRY,
+        iter_jsonl,
+        ["dictionaries/*/*.jsonl"],
+    ),
+    "commentary": (
+        schemas.GLOSSA,
+        iter_jsonl,
+        ["commentaries/*/glossae_*.jsonl"],
+    ),
+    "syntax-tree": (
+        schemas.SYNTAX_TREE,
+        iter_json_list,
+        ["annotations/syntax-trees/*.json"],
+    ),
+    "alignment": (
+        schemas.ALIGNMENT,
+        iter_json,
+        ["annotations/text-alignments/*.json"],
+    ),
+    "token-annotation": (
+        schemas.TOKEN_ANNOTATION,
+        iter_csv,
+        ["annotations/token-annotations/*/*.csv"],
+    ),
+}
+
+
+def validate_format(test_data_dir: pathlib.Path, format_name: str) -> dict:
+    schema, iter_records, patterns = FORMATS[format_name]
+    loads = get_deserializer()
+    paths = sorted(path for pattern in patterns for path in test_data_dir.glob(pattern))
+
+    files = {}
+    records = 0
+    start = time.perf_counter()
+    for path in paths:
+        error_counts = collections.Counter()
+        for record in iter_records(path, loads):
+            schema.check(record, error_counts)
+            records += 1
+        if error_counts:
+            files[str(path.relative_to(test_data_dir))] = dict(error_counts)
+    seconds = time.perf_counter() - start
+
+    return {
+        "files": len(paths),
+        "records": records,
+        "seconds": round(seconds, 3),
+        "records_per_second": round(records / seconds) if seconds else None,
+        "errors": files,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "test_data_dir", type=pathlib.Path, nargs="?", default=TEST_DATA_DIR
+    )
+    parser.add_argument(
+        "--format",
+        action="append",
+        choices=list(FORMATS),
+        help="only check this format (may be repeated)",
+    )
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = {
+        format_name: validate_format(args.test_data_dir, format_name)
+        for format_name in args.format or FORMATS
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        for format_name, result in report.items():
+            print(
+                f"{format_name:>16}: {result['files']:4} files "
+                f"{result['records']:8} records in {result['seconds']:7.3f}s "
+                f"({result['records_per_second'] or 0:,} records/s)"
+            )
+            for filename, error_counts in result["errors"].items():
+                print(f"  Errors in {filename}:")
+                for error, count in error_counts.items():
+                    print(f"    {error}: {count}")
+
+    sys.exit(1 if any(result["errors"] for result in report.values()) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+
+"""
+Incremental reading of dictionary XML files, shared by the LSJ, Middle Liddell,
+Lewis and Short and elementary Latin conversion scripts.
+"""
+
+from typing import Iterator
+
+from lxml import etree
+
+
+def _is_entry(el, tag: str, path: tuple, exact: bool) -> bool:
+    ancestors = []
+    parent = el.getparent()
+    # the root itself isn't part of the path, as in root.xpath("text//div2")
+    while parent is not None and parent.getparent() is not None:
+        ancestors.append(parent.tag)
+        parent = parent.getparent()
+    ancestors.reverse()
+    # nested entries are yielded after the entry they are in, if at all
+    if tag in ancestors:
+        return False
+    if exact:
+        return tuple(ancestors) == path
+    return tuple(ancestors[: len(path)]) == path
+
+
+def _with_nested(el, tag: str, exact: bool) -> Iterator[etree._Element]:
+    yield el
+    # "text//div2" also matches div2 elements inside another div2
+    if not exact:
+        yield from el.iterdescendants(tag)
+
+
+def _free(el) -> None:
+    parent = el.getparent()
+    el.clear()
+    while el.getprevious() is not None:
+        del parent[0]
+
+
+def iter_entries(
+    source, tag: str, path: tuple = ("text",), exact: bool = False
+) -> Iterator[etree._Element]:
+    """
+    Yields the `tag` elements of `source` in document order, as
+    root.xpath("text//{tag}") does, or root.xpath("text/body/div0/{tag}") with
+    path=("text", "body", "div0") and exact=True.
+
+    The file is parsed incrementally, and each entry is freed once the next one is
+    requested, so memory use depends on the size of the largest entry rather than on
+    that of the dictionary. An entry is only yielded at the next parser event, once
+    its tail text has been read, so to_string(entry) with tails is unchanged.
+    """
+    pending = None
+    for _, el in etree.iterparse(str(source), events=("end",)):
+        if pending is not None:
+            yield from _with_nested(pending, tag, exact)
+            _free(pending)
+            pending = None
+        if el.tag == tag and _is_entry(el, tag, path, exact):
+            pending = el
+    if pending is not None:
+        yield from _with_nested(pending, tag, exact)